@@ -1,4 +1,5 @@
 import json
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -9,20 +10,25 @@ import numpy as np
 DATA_FILE = Path(__file__).parent / "data.json"
 BLOB_DIR = Path(__file__).parent / "blob"
 
+# the feeder rotors save their positions from separate threads
+_data_lock = threading.RLock()
+
 
 def loadData() -> dict[str, Any]:
-    if not DATA_FILE.exists():
-        return {}
-    try:
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    with _data_lock:
+        if not DATA_FILE.exists():
+            return {}
+        try:
+            with open(DATA_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
 
 
 def saveData(data: dict[str, Any]) -> None:
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    with _data_lock:
+        with open(DATA_FILE, "w") as f:
+            json.dump(data, f, indent=2)
 
 
 def getMachineId() -> str:
@@ -49,11 +55,12 @@ def getStepperPosition(name: str) -> int:
 
 
 def setStepperPosition(name: str, position_steps: int) -> None:
-    data = loadData()
-    if "stepper_positions" not in data:
-        data["stepper_positions"] = {}
-    data["stepper_positions"][name] = position_steps
-    saveData(data)
+    with _data_lock:
+        data = loadData()
+        if "stepper_positions" not in data:
+            data["stepper_positions"] = {}
+        data["stepper_positions"][name] = position_steps
+        saveData(data)
 
 
 def getServoPosition(name: str) -> int:
@@ -2,6 +2,7 @@ import os
 import sys
 import argparse
 import uuid
+from typing import Optional
 from logger import Logger
 from blob_manager import getMachineId
 
@@ -42,17 +43,45 @@ class RotorPulseConfig:
         self.delay_between_pulse_ms = delay_between_ms
 
 
+class RotorSpeedConfig:
+    cruise_deg_per_s: float
+    slow_deg_per_s: float
+    accel_deg_per_s2: float
+
+    def __init__(
+        self,
+        cruise_deg_per_s: float,
+        slow_deg_per_s: float,
+        accel_deg_per_s2: float = 120,
+    ):
+        self.cruise_deg_per_s = cruise_deg_per_s
+        self.slow_deg_per_s = slow_deg_per_s
+        self.accel_deg_per_s2 = accel_deg_per_s2
+
+
+FEEDER_MODE_PULSE = "pulse"
+FEEDER_MODE_CONTINUOUS = "continuous"
+
+
 class FeederConfig:
+    mode: str
     first_rotor: RotorPulseConfig
     second_rotor_normal: RotorPulseConfig
     second_rotor_precision: RotorPulseConfig
     third_rotor_normal: RotorPulseConfig
     third_rotor_precision: RotorPulseConfig
+    first_rotor_speed: RotorSpeedConfig
+    second_rotor_speed: RotorSpeedConfig
+    third_rotor_speed: RotorSpeedConfig
+    speed_interval_ms: int
+    sorter_hardware_config_path: Optional[str]
     third_channel_dropzone_threshold_px: int
     second_channel_dropzone_threshold_px: int
     object_channel_overlap_threshold: float
+    max_frame_age_ms: int
 
     def __init__(self):
+        self.mode = FEEDER_MODE_PULSE
         self.first_rotor = RotorPulseConfig(
             steps=100,
             delay_us=500,
@@ -93,9 +122,27 @@ class FeederConfig:
             accel_steps=26,
             decel_steps=26,
         )
+        # continuous mode: each rotor turns at cruise speed, slows once a piece is in
+        # its precise zone and stops while the channel it drops into is occupied. the
+        # first channel has no precise zone, its rotor slows while channel 3 is occupied
+        # since channel 2 will be held up behind it
+        self.first_rotor_speed = RotorSpeedConfig(cruise_deg_per_s=5, slow_deg_per_s=2)
+        self.second_rotor_speed = RotorSpeedConfig(
+            cruise_deg_per_s=60, slow_deg_per_s=15
+        )
+        self.third_rotor_speed = RotorSpeedConfig(
+            cruise_deg_per_s=90, slow_deg_per_s=20
+        )
+        # how often each rotor re-decides its speed without a new frame
+        self.speed_interval_ms = 100
+        # toml mapping the sorter interface boards, continuous mode drives the rotors
+        # through them
+        self.sorter_hardware_config_path = None
         self.third_channel_dropzone_threshold_px = 350
         self.second_channel_dropzone_threshold_px = 500
         self.object_channel_overlap_threshold = 0.15
+        # feeder decisions are never made from a frame older than this
+        self.max_frame_age_ms = 300
 
 
 class GlobalConfig:
@@ -115,6 +162,11 @@ class GlobalConfig:
     telemetry_url: str
     log_buffer_size: int
     disable_chute: bool
+    inference_in_subprocess: bool
+    inference_lane_per_model: bool
+    inference_backend: str
+    inference_int8: bool
+    inference_int8_data: Optional[str]
 
     def __init__(self):
         self.debug_level = 0
@@ -123,6 +175,11 @@ class GlobalConfig:
         self.should_profile_feeder = False
         self.log_buffer_size = 100
         self.disable_chute = False
+        self.inference_in_subprocess = False
+        self.inference_lane_per_model = False
+        self.inference_backend = "torch"
+        self.inference_int8 = False
+        self.inference_int8_data = None
 
 
 def mkTimeouts() -> Timeouts:
@@ -132,6 +189,18 @@ def mkTimeouts() -> Timeouts:
 
 def mkFeederConfig() -> FeederConfig:
     feeder_config = FeederConfig()
+    feeder_config.mode = os.getenv("FEEDER_MODE", feeder_config.mode)
+    if feeder_config.mode not in (FEEDER_MODE_PULSE, FEEDER_MODE_CONTINUOUS):
+        raise ValueError(f"unknown FEEDER_MODE {feeder_config.mode}")
+    feeder_config.sorter_hardware_config_path = os.getenv("SORTER_HARDWARE_CONFIG")
+    if (
+        feeder_config.mode == FEEDER_MODE_CONTINUOUS
+        and not feeder_config.sorter_hardware_config_path
+    ):
+        raise ValueError("FEEDER_MODE continuous needs SORTER_HARDWARE_CONFIG")
+    feeder_config.max_frame_age_ms = int(
+        os.getenv("FEEDER_MAX_FRAME_AGE_MS", str(feeder_config.max_frame_age_ms))
+    )
     return feeder_config
 
 
@@ -159,6 +228,20 @@ def mkGlobalConfig() -> GlobalConfig:
     gc.run_id = str(uuid.uuid4())
     gc.telemetry_enabled = os.getenv("TELEMETRY_ENABLED", "0") == "1"
     gc.telemetry_url = os.getenv("TELEMETRY_URL", "https://api.basically.website")
+    gc.inference_in_subprocess = os.getenv("INFERENCE_IN_SUBPROCESS", "0") == "1"
+    gc.inference_lane_per_model = os.getenv("INFERENCE_LANE_PER_MODEL", "0") == "1"
+    gc.inference_backend = os.getenv("INFERENCE_BACKEND", gc.inference_backend)
+    # imported here, vision imports this module
+    from vision.backends import BACKENDS
+
+    # models load in the background, a typo would otherwise only fail there
+    if gc.inference_backend not in BACKENDS:
+        raise ValueError(
+            f"unknown INFERENCE_BACKEND {gc.inference_backend}, "
+            f"expected one of {', '.join(BACKENDS)}"
+        )
+    gc.inference_int8 = os.getenv("INFERENCE_INT8", "0") == "1"
+    gc.inference_int8_data = os.getenv("INFERENCE_INT8_DATA") or None
 
     gc.disable_chute = "chute" in args.disable
 
@@ -202,6 +202,11 @@ class StepperMotor:
             raise ValueError("steps_per_revolution must be a positive integer")
         self._steps_per_revolution = value
     
+    @property
+    def microsteps(self) -> int:
+        """Get the microsteps last set on the driver."""
+        return self._microsteps
+
     @property
     def channel(self):
         return self._channel
@@ -1,14 +1,21 @@
 import time
+import tomllib
 
-from global_config import GlobalConfig
+from global_config import GlobalConfig, FEEDER_MODE_CONTINUOUS
+from hardware.sorter_hardware import SorterHardware
+from hardware.sorter_interface import StepperMotor
 from .mcu import MCU
 from .stepper import Stepper
 from .device_discovery import discoverMCU
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Tuple
 
 SERVO_OPEN_ANGLE = 0
 SERVO_CLOSED_ANGLE = 72
 
+# logical stepper names of the first, second and third c-channel rotors in the
+# sorter hardware toml
+ROTOR_MOTOR_NAMES = ("bulk_rotor", "rotor1", "rotor2")
+
 if TYPE_CHECKING:
     from subsystems.distribution.chute import Chute
 
@@ -78,17 +85,24 @@ class IRLInterface:
     first_c_channel_rotor_stepper: Stepper
     second_c_channel_rotor_stepper: Stepper
     third_c_channel_rotor_stepper: Stepper
+    # only set in continuous feeder mode, where the rotors are on the sorter
+    # interface boards
+    sorter_hardware: Optional[SorterHardware]
+    rotor_motors: Optional[Tuple[StepperMotor, StepperMotor, StepperMotor]]
     servo_angles: list[int]
     chute: "Chute"
     distribution_layout: DistributionLayout
 
     def __init__(self):
-        pass
+        self.sorter_hardware = None
+        self.rotor_motors = None
 
     def shutdownMotors(self) -> None:
         self.first_c_channel_rotor_stepper.disable()
         self.second_c_channel_rotor_stepper.disable()
         self.third_c_channel_rotor_stepper.disable()
+        if self.sorter_hardware is not None:
+            self.sorter_hardware.shutdown_all()
 
 
 def mkCameraConfig(
@@ -168,6 +182,17 @@ def mkIRLConfig() -> IRLConfig:
     return irl_config
 
 
+def mkSorterHardware(config_path: str) -> SorterHardware:
+    with open(config_path, "rb") as f:
+        config = tomllib.load(f)
+    missing = [
+        name for name in ROTOR_MOTOR_NAMES if name not in config.get("steppers", {})
+    ]
+    if missing:
+        raise ValueError(f"{config_path} has no steppers {', '.join(missing)}")
+    return SorterHardware(config)
+
+
 def mkIRLInterface(config: IRLConfig, gc: GlobalConfig) -> IRLInterface:
     irl_interface = IRLInterface()
 
@@ -232,6 +257,18 @@ def mkIRLInterface(config: IRLConfig, gc: GlobalConfig) -> IRLInterface:
     )
     time.sleep(1)
 
+    fc = gc.feeder_config
+    if fc.mode == FEEDER_MODE_CONTINUOUS:
+        assert fc.sorter_hardware_config_path is not None
+        irl_interface.sorter_hardware = mkSorterHardware(fc.sorter_hardware_config_path)
+        first, second, third = (
+            irl_interface.sorter_hardware.steppers[name] for name in ROTOR_MOTOR_NAMES
+        )
+        irl_interface.rotor_motors = (first, second, third)
+        gc.logger.info(
+            f"Feeder rotors on the sorter interface boards from {fc.sorter_hardware_config_path}"
+        )
+
     irl_interface.distribution_layout = mkLayoutFromConfig(config.bin_layout_config)
 
     num_layers = len(irl_interface.distribution_layout.layers)
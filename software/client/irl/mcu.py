@@ -20,6 +20,11 @@ class MCU:
         time.sleep(ARDUINO_RESET_DELAY_MS / 1000.0)
 
         self.command_queue: queue.Queue = queue.Queue()
+        # estimates of when the last queued command gets written, and when the
+        # firmware is done with everything queued so far, see command()
+        self._timing_lock = threading.Lock()
+        self._next_write_at = 0.0
+        self.busy_until = 0.0
         self.running = True
         self.callbacks: dict[str, Callable] = {}
 
@@ -31,7 +36,16 @@ class MCU:
 
         gc.logger.info(f"MCU initialized on {port}")
 
-    def command(self, *args) -> None:
+    def command(self, *args, busy_s: float = 0.0) -> float:
+        # returns when the firmware should be done with this command. busy_s is how
+        # long it blocks the firmware once received, which executes one command at a
+        # time. only an estimate, the firmware doesn't say which command finished
+        with self._timing_lock:
+            now = time.time()
+            written_at = max(now, self._next_write_at)
+            self._next_write_at = written_at + COMMAND_WRITE_DELAY_MS / 1000.0
+            self.busy_until = max(written_at, self.busy_until) + busy_s
+            done_at = self.busy_until
         if self.running:
             self.command_queue.put(args)
             queue_size = self.command_queue.qsize()
@@ -39,6 +53,7 @@ class MCU:
                 self.gc.logger.warn(
                     f"MCU command queue size is large: {queue_size} commands pending"
                 )
+        return done_at
 
     def registerCallback(self, message_type: str, callback: Callable) -> None:
         self.callbacks[message_type] = callback
@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from hardware.sorter_interface import StepperMotor
+
+# the feeder rotors turn the negative step direction, same as their pulses
+ROTOR_DIRECTION = -1
+
+
+class RotorDrive(ABC):
+    # turns a c-channel rotor continuously at a speed in degrees per second, 0 stops
+    # it. run() is called every time the speed is re-decided, often with the same speed
+    @abstractmethod
+    def run(self, deg_per_s: float) -> None:
+        pass
+
+    def stop(self) -> None:
+        self.run(0.0)
+
+
+class BoardRotorDrive(RotorDrive):
+    # the sorter interface board steps each rotor on its own and ramps between speeds
+    # itself, at the acceleration set here. the speed is only sent when it changes
+    _motor: StepperMotor
+    _steps_per_deg: float
+    _speed: int
+
+    def __init__(self, motor: StepperMotor, accel_deg_per_s2: float):
+        self._motor = motor
+        self._steps_per_deg = motor.steps_per_revolution * motor.microsteps / 360.0
+        self._speed = 0
+        self._motor.set_acceleration(
+            max(1, int(round(accel_deg_per_s2 * self._steps_per_deg)))
+        )
+
+    def run(self, deg_per_s: float) -> None:
+        speed = ROTOR_DIRECTION * int(round(max(0.0, deg_per_s) * self._steps_per_deg))
+        if speed != self._speed:
+            self._motor.move_at_speed(speed)
+            self._speed = speed
@@ -12,6 +12,33 @@ DEFAULT_ACCEL_START_DELAY_MULTIPLIER = 2
 DEFAULT_ACCEL_STEPS = 24
 
 
+def moveDurationS(
+    steps: int,
+    delay_us: int,
+    accel_start_delay_us: int,
+    accel_steps: int,
+    decel_steps: int,
+) -> float:
+    # how long the firmware spends on a "T" move, it steps through the same ramps and
+    # holds the step pin high then low for each step's delay
+    abs_steps = abs(steps)
+    delay_us = max(1, delay_us)
+    start_delay_us = max(delay_us, accel_start_delay_us)
+    accel_zone = max(0, accel_steps)
+    decel_zone = max(0, decel_steps)
+    if accel_zone + decel_zone > abs_steps:
+        accel_zone = abs_steps // 2
+        decel_zone = abs_steps - accel_zone
+    delay_delta = start_delay_us - delay_us
+    total_us = abs_steps * delay_us
+    if delay_delta > 0:
+        for i in range(accel_zone):
+            total_us += delay_delta - (delay_delta * (i + 1)) // accel_zone
+        for i in range(decel_zone):
+            total_us += (delay_delta * (i + 1)) // decel_zone
+    return 2 * total_us / 1_000_000
+
+
 class Stepper:
     def __init__(
         self,
@@ -88,6 +115,9 @@ class Stepper:
             accel_start_delay_us,
             accel_steps,
             decel_steps,
+            busy_s=moveDurationS(
+                steps, delay_us, accel_start_delay_us, accel_steps, decel_steps
+            ),
         )
         self.current_position_steps += steps
         setStepperPosition(self.name, self.current_position_steps)
@@ -99,7 +129,8 @@ class Stepper:
         accel_start_delay_us: int | None = None,
         accel_steps: int | None = None,
         decel_steps: int | None = None,
-    ) -> None:
+    ) -> float:
+        # returns when the move should be done, the command is only queued here
         if delay_us is None:
             delay_us = self.default_delay_us
         if accel_start_delay_us is None:
@@ -108,7 +139,7 @@ class Stepper:
             accel_steps = self.default_accel_steps
         if decel_steps is None:
             decel_steps = self.default_decel_steps
-        self.mcu.command(
+        done_at = self.mcu.command(
             "T",
             self.step_pin,
             self.dir_pin,
@@ -117,9 +148,13 @@ class Stepper:
             accel_start_delay_us,
             accel_steps,
             decel_steps,
+            busy_s=moveDurationS(
+                steps, delay_us, accel_start_delay_us, accel_steps, decel_steps
+            ),
         )
         self.current_position_steps += steps
         setStepperPosition(self.name, self.current_position_steps)
+        return done_at
 
     def disable(self) -> None:
         self.mcu.command("D", self.enable_pin, 1)
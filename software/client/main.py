@@ -18,7 +18,7 @@ from telemetry import Telemetry
 from message_queue.handler import handleServerToMainEvent
 from defs.events import HeartbeatEvent, HeartbeatData, MainThreadToServerCommand
 from irl.config import mkIRLConfig, mkIRLInterface
-from vision import VisionManager
+from vision import VisionManager, mkModelRegistry
 import uvicorn
 import threading
 import queue
@@ -64,13 +64,15 @@ def main() -> None:
     setRuntimeVariables(rv)
     setCommandQueue(server_to_main_queue)
     irl_config = mkIRLConfig()
+    # models load and warm up in the background while the hardware initializes
+    model_registry = mkModelRegistry(gc)
     irl = mkIRLInterface(irl_config, gc)
 
     gc.logger.info("Homing chute to zero...")
     irl.chute.home()
 
     telemetry = Telemetry(gc)
-    vision = VisionManager(irl_config, gc)
+    vision = VisionManager(irl_config, gc, model_registry)
     vision.setTelemetry(telemetry)
     controller = SorterController(
         irl, irl_config, gc, vision, main_to_server_queue, rv, telemetry
@@ -0,0 +1,124 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark_inference_batch import loadFrames
+from vision.backends import ModelBackend, BACKENDS, BACKEND_TORCH
+from vision.inference import runModel, detectionsFromResults
+from vision.types import Detections
+
+WARMUP_RUNS = 3
+MATCH_IOU = 0.5
+
+
+def boxIou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # (N, 4) x (M, 4) xyxy -> (N, M)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def matchDetections(
+    reference: Detections, candidate: Detections
+) -> tuple[int, list[float]]:
+    # greedy same-class matching by box iou, returns match count and matched ious
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0, []
+    iou = boxIou(reference.boxes, candidate.boxes)
+    iou[reference.class_ids[:, None] != candidate.class_ids[None, :]] = 0
+    matched = []
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < MATCH_IOU:
+            break
+        matched.append(float(iou[i, j]))
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return len(matched), matched
+
+
+def runBackend(
+    backend: ModelBackend, model_path: str, frames: list[np.ndarray]
+) -> tuple[list[float], list[Detections]]:
+    model = backend.load(model_path)
+    for _ in range(WARMUP_RUNS):
+        runModel(model, frames[:1])
+    latencies = []
+    detections = []
+    for frame in frames:
+        start = time.perf_counter()
+        results = runModel(model, [frame])
+        latencies.append((time.perf_counter() - start) * 1000)
+        detections.append(detectionsFromResults(results[0], model.names))
+    return latencies, detections
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="latency and agreement with the torch model for each inference backend"
+    )
+    parser.add_argument("model", help="path to the .pt weights")
+    parser.add_argument(
+        "--video", help="recorded camera feed to sample frames from (blob/*.mp4)"
+    )
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument(
+        "--backends",
+        default=",".join(BACKENDS),
+        help=f"comma separated, from {', '.join(BACKENDS)}",
+    )
+    parser.add_argument("--int8", action="store_true", help="also try int8 exports")
+    parser.add_argument("--int8-data", help="dataset yaml for int8 calibration")
+    args = parser.parse_args()
+
+    frames = loadFrames(args.video, args.frames)
+    backends = [ModelBackend(BACKEND_TORCH)]
+    for name in args.backends.split(","):
+        if name != BACKEND_TORCH:
+            backends.append(ModelBackend(name))
+            if args.int8:
+                backends.append(ModelBackend(name, True, args.int8_data))
+
+    reference: list[Detections] = []
+    print(
+        f"{'backend':>14} {'mean ms':>8} {'p95 ms':>8} {'recall':>7} {'precision':>9} {'box iou':>8}"
+    )
+    for backend in backends:
+        label = backend.name + ("-int8" if backend.int8 else "")
+        try:
+            latencies, detections = runBackend(backend, args.model, frames)
+        except Exception as e:
+            print(f"{label:>14} failed: {e}")
+            continue
+        if not reference:
+            reference = detections
+
+        # agreement with torch stands in for accuracy, recordings have no ground truth
+        matches = 0
+        ious: list[float] = []
+        for ref, det in zip(reference, detections):
+            count, matched = matchDetections(ref, det)
+            matches += count
+            ious.extend(matched)
+        ref_total = sum(len(d) for d in reference)
+        det_total = sum(len(d) for d in detections)
+        recall = matches / ref_total if ref_total else 1.0
+        precision = matches / det_total if det_total else 1.0
+        mean_iou = float(np.mean(ious)) if ious else 0.0
+        print(
+            f"{label:>14} {np.mean(latencies):>7.1f} {np.percentile(latencies, 95):>8.1f} "
+            f"{recall:>7.3f} {precision:>9.3f} {mean_iou:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
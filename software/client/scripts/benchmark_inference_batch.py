@@ -0,0 +1,76 @@
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+
+from ultralytics import YOLO
+
+WARMUP_RUNS = 3
+
+
+def predictBatch(model: YOLO, frames: list[np.ndarray]) -> None:
+    # every batch size goes through predict(), a lone frame through track() would
+    # make the speedup compare two different code paths
+    model.predict(frames, verbose=False)
+
+
+def loadFrames(video_path: str | None, count: int) -> list[np.ndarray]:
+    if video_path is None:
+        rng = np.random.default_rng(0)
+        return [
+            rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(count)
+        ]
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        print(f"could not read frames from {video_path}")
+        sys.exit(1)
+    while len(frames) < count:
+        frames.append(frames[len(frames) % len(frames)])
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="per-frame inference latency vs batch size on cpu"
+    )
+    parser.add_argument("model", help="path to the .pt weights")
+    parser.add_argument(
+        "--video", help="recorded camera feed to sample frames from (blob/*.mp4)"
+    )
+    parser.add_argument("--max-batch", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+    frames = loadFrames(args.video, args.max_batch)
+
+    for _ in range(WARMUP_RUNS):
+        predictBatch(model, frames[:1])
+
+    print(f"{'batch':>5} {'batch ms':>10} {'per frame ms':>13} {'speedup':>8}")
+    baseline_per_frame = None
+    for batch_size in range(1, args.max_batch + 1):
+        batch = frames[:batch_size]
+        predictBatch(model, batch)
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            predictBatch(model, batch)
+        batch_ms = (time.perf_counter() - start) * 1000 / args.runs
+        per_frame_ms = batch_ms / batch_size
+        if baseline_per_frame is None:
+            baseline_per_frame = per_frame_ms
+        print(
+            f"{batch_size:>5} {batch_ms:>9.1f}ms {per_frame_ms:>12.1f}ms {baseline_per_frame / per_frame_ms:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
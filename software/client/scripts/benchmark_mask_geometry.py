@@ -0,0 +1,98 @@
+import sys
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vision.types import CompactMask
+
+FRAME_SHAPE = (1080, 1920)
+
+
+def mkPieceMasks(count: int, seed: int = 0) -> list[np.ndarray]:
+    # ellipses about the size of a part on the feeder camera
+    rng = np.random.default_rng(seed)
+    masks = []
+    for _ in range(count):
+        mask = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        center = (int(rng.integers(100, 1820)), int(rng.integers(100, 980)))
+        axes = (int(rng.integers(10, 80)), int(rng.integers(10, 80)))
+        cv2.ellipse(mask, center, axes, float(rng.uniform(0, 180)), 0, 360, 1, -1)
+        masks.append(mask.astype(bool))
+    return masks
+
+
+def denseArgwhere(mask: np.ndarray) -> tuple[tuple[float, float], int]:
+    # centroid and area the way the feeder did it on full-frame masks
+    coords = np.argwhere(mask)
+    return (float(np.mean(coords[:, 1])), float(np.mean(coords[:, 0]))), len(coords)
+
+
+def cropArgwhere(mask: CompactMask) -> tuple[tuple[float, float], int]:
+    # argwhere over just the bounding window
+    coords = np.argwhere(mask.crop)
+    return (
+        mask.x + float(np.mean(coords[:, 1])),
+        mask.y + float(np.mean(coords[:, 0])),
+    ), len(coords)
+
+
+def cropMoments(mask: CompactMask) -> tuple[tuple[float, float], int]:
+    # uncached, a fresh mask every call
+    fresh = CompactMask(mask.x, mask.y, mask.crop, mask.grid_shape)
+    centroid = fresh.centroid
+    assert centroid is not None
+    return centroid, fresh.area
+
+
+def cachedMoments(mask: CompactMask) -> tuple[tuple[float, float], int]:
+    centroid = mask.centroid
+    assert centroid is not None
+    return centroid, mask.area
+
+
+def timeIt(fn, items: list, runs: int) -> tuple[float, list]:
+    results = [fn(item) for item in items]
+    start = time.perf_counter()
+    for _ in range(runs):
+        for item in items:
+            fn(item)
+    elapsed = time.perf_counter() - start
+    return elapsed / (runs * len(items)) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="centroid and area of feeder masks: argwhere vs cached cv2.moments"
+    )
+    parser.add_argument("--masks", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    dense = mkPieceMasks(args.masks)
+    compact = [CompactMask.fromDense(m) for m in dense]
+
+    reference = None
+    print(f"{'method':>16} {'us/mask':>10} {'max centroid err':>17} {'area err':>9}")
+    for label, fn, items in (
+        ("dense argwhere", denseArgwhere, dense),
+        ("crop argwhere", cropArgwhere, compact),
+        ("crop moments", cropMoments, compact),
+        ("cached moments", cachedMoments, compact),
+    ):
+        us, results = timeIt(fn, items, args.runs)
+        if reference is None:
+            reference = results
+        centroid_err = max(
+            float(np.hypot(r[0][0] - c[0][0], r[0][1] - c[0][1]))
+            for r, c in zip(reference, results)
+        )
+        area_err = max(abs(r[1] - c[1]) for r, c in zip(reference, results))
+        print(f"{label:>16} {us:>10.1f} {centroid_err:>17.2e} {area_err:>9}")
+
+
+if __name__ == "__main__":
+    main()
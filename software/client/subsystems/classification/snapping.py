@@ -8,6 +8,7 @@ from states.base_state import BaseState
 from subsystems.shared_variables import SharedVariables
 from .states import ClassificationState
 from .carousel import Carousel, CLASSIFICATION_POSITION
+from .known_object import KnownObject
 from irl.config import IRLInterface
 from global_config import GlobalConfig
 from defs.events import KnownObjectEvent, KnownObjectData, KnownObjectStatus
@@ -16,6 +17,7 @@ from classification import classify
 
 if TYPE_CHECKING:
     from vision import VisionManager
+    from vision.types import CameraFrame
 
 # spencer todo: add back when there is constant run id per run, save in that blob dir
 # SNAP_DIR = "/tmp/sorter_snaps"
@@ -84,24 +86,33 @@ class Snapping(BaseState):
             self.logger.warn("Snapping: no piece at classification position")
             return
 
+        # the frames come retained, their pooled buffers stay alive until the images
+        # below are encoded
         top_frame, bottom_frame = self.vision.captureFreshClassificationFrames()
-        top_crop, bottom_crop = self.vision.getClassificationCrops()
+        held_frames = [f for f in (top_frame, bottom_frame) if f is not None]
+        try:
+            self._classifyFrames(piece, top_frame, bottom_frame)
+        finally:
+            for frame in held_frames:
+                frame.release()
+
+    def _classifyFrames(
+        self,
+        piece: KnownObject,
+        top_frame: Optional["CameraFrame"],
+        bottom_frame: Optional["CameraFrame"],
+    ) -> None:
+        top_crop, bottom_crop = self.vision.getClassificationCrops(
+            top_frame, bottom_frame
+        )
 
         if top_frame and top_frame.annotated is not None:
             self.telemetry.saveCapture(
-                "classification_chamber_top",
-                top_frame.raw,
-                top_frame.annotated,
-                "capture",
-                segmentation_map=top_frame.segmentation_map,
+                "classification_chamber_top", top_frame, "capture"
             )
         if bottom_frame and bottom_frame.annotated is not None:
             self.telemetry.saveCapture(
-                "classification_chamber_bottom",
-                bottom_frame.raw,
-                bottom_frame.annotated,
-                "capture",
-                segmentation_map=bottom_frame.segmentation_map,
+                "classification_chamber_bottom", bottom_frame, "capture"
             )
 
         if top_crop is None or bottom_crop is None:
@@ -1,14 +1,32 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Tuple, TYPE_CHECKING
 import numpy as np
-from vision.utils import maskCenterOfMass
-from vision.types import DetectedMask
+from vision.tracker import Track
+from vision.types import CompactMask
 
 if TYPE_CHECKING:
     from irl.config import ArucoTagConfig
 
 OBJECT_DETECTION_CONFIDENCE_THRESHOLD = 0.4
+# frame pixels per cell of the channel label map
+LABEL_MAP_SCALE = 2
+# when set, an object is in a zone once this fraction of its mask lies in it, instead
+# of going by its centroid alone
+DROPZONE_MIN_MASK_FRACTION: Optional[float] = None
+PRECISE_QUADRANTS = (3,)
+DROPZONE_QUADRANTS = (0, 1)
+# label of (channel, quadrant) in the label map, 0 is outside every channel
+LABEL_COUNT = 16
+
+
+def channelLabel(channel_id: int, quadrant: int) -> int:
+    return channel_id * 4 + quadrant
+
+
+def channelLabels(channel_id: int, quadrants: np.ndarray) -> np.ndarray:
+    # channelLabel over an array of quadrants
+    return (channel_id * 4 + quadrants).astype(np.uint8)
 
 
 class FeederAnalysisState(Enum):
@@ -27,10 +45,91 @@ class CircularChannel:
     radius1_angle_image: float  # angle to radius1 tag in image space
 
 
+@dataclass
+class ChannelLabelMap:
+    # (channel, quadrant) label of every cell over the channels' bounding box
+    origin: Tuple[float, float]
+    scale: float
+    labels: np.ndarray
+
+    def lookup(self, points: np.ndarray) -> np.ndarray:
+        # (N, 2) frame xy -> (N,) labels
+        h, w = self.labels.shape
+        cols = np.floor((points[:, 0] - self.origin[0]) / self.scale).astype(np.int64)
+        rows = np.floor((points[:, 1] - self.origin[1]) / self.scale).astype(np.int64)
+        inside = (cols >= 0) & (cols < w) & (rows >= 0) & (rows < h)
+        out = np.zeros(len(points), dtype=np.uint8)
+        out[inside] = self.labels[rows[inside], cols[inside]]
+        return out
+
+    def maskFractions(self, mask: CompactMask) -> np.ndarray:
+        # fraction of the mask's pixels under each label
+        crop = mask.crop
+        total = np.count_nonzero(crop)
+        if total == 0:
+            return np.zeros(LABEL_COUNT)
+        # frame position of each mask pixel's centre, then the cell it falls in
+        ox, oy, sx, sy = mask.grid
+        xs = ox + (mask.x + np.arange(mask.width) + 0.5) * sx
+        ys = oy + (mask.y + np.arange(mask.height) + 0.5) * sy
+        h, w = self.labels.shape
+        cols = np.floor((xs - self.origin[0]) / self.scale).astype(np.int64)
+        rows = np.floor((ys - self.origin[1]) / self.scale).astype(np.int64)
+        valid_cols = (cols >= 0) & (cols < w)
+        valid_rows = (rows >= 0) & (rows < h)
+        labels = self.labels[np.ix_(rows[valid_rows], cols[valid_cols])]
+        counts = np.bincount(
+            labels[crop[np.ix_(valid_rows, valid_cols)]], minlength=LABEL_COUNT
+        )
+        # pixels outside the map are outside every channel
+        counts[0] += total - counts.sum()
+        return counts / total
+
+
 @dataclass
 class ChannelGeometry:
     second_channel: Optional[CircularChannel]
     third_channel: Optional[CircularChannel]
+    _label_map: Optional[ChannelLabelMap] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def labelMap(self) -> Optional[ChannelLabelMap]:
+        # built once per geometry, locked geometry is the same object frame to frame
+        if self._label_map is None:
+            self._label_map = buildChannelLabelMap(self)
+        return self._label_map
+
+
+def buildChannelLabelMap(
+    geometry: ChannelGeometry, scale: float = LABEL_MAP_SCALE
+) -> Optional[ChannelLabelMap]:
+    channels = [
+        ch for ch in (geometry.second_channel, geometry.third_channel) if ch is not None
+    ]
+    if not channels:
+        return None
+    x1 = min(ch.center[0] - ch.radius for ch in channels)
+    y1 = min(ch.center[1] - ch.radius for ch in channels)
+    x2 = max(ch.center[0] + ch.radius for ch in channels)
+    y2 = max(ch.center[1] + ch.radius for ch in channels)
+    w = int(np.ceil((x2 - x1) / scale)) + 1
+    h = int(np.ceil((y2 - y1) / scale)) + 1
+    xs = x1 + (np.arange(w) + 0.5) * scale
+    ys = y1 + (np.arange(h) + 0.5) * scale
+
+    labels = np.zeros((h, w), dtype=np.uint8)
+    # channel 3 (innermost) is painted last so it wins where the circles overlap
+    for ch in channels:
+        dx = xs[None, :] - ch.center[0]
+        dy = ys[:, None] - ch.center[1]
+        inside = dx * dx + dy * dy <= ch.radius * ch.radius
+        relative_angle = np.mod(
+            np.degrees(np.arctan2(dy, dx)) - ch.radius1_angle_image, 360.0
+        )
+        quadrant = np.minimum((relative_angle / 90.0).astype(np.uint8), 3)
+        labels[inside] = channelLabels(ch.channel_id, quadrant)[inside]
+    return ChannelLabelMap(origin=(x1, y1), scale=scale, labels=labels)
 
 
 def computeChannelGeometry(
@@ -90,120 +189,72 @@ def computeChannelGeometry(
     return geometry
 
 
-def isPointInCircle(
-    point: Tuple[float, float],
-    center: Tuple[float, float],
-    radius: float,
-) -> bool:
-    distance = np.linalg.norm(np.array(point) - np.array(center))
-    return distance <= radius
+@dataclass(frozen=True)
+class ChannelOccupancy:
+    # which zones of channels 2 and 3 hold a piece, each rotor acts on its own channel
+    second_precise: bool = False
+    second_dropzone: bool = False
+    third_precise: bool = False
+    third_dropzone: bool = False
+
+    @property
+    def second_occupied(self) -> bool:
+        return self.second_precise or self.second_dropzone
+
+    @property
+    def third_occupied(self) -> bool:
+        return self.third_precise or self.third_dropzone
+
+    @property
+    def state(self) -> FeederAnalysisState:
+        # in priority order
+        if self.third_precise:
+            return FeederAnalysisState.OBJECT_IN_3_DROPZONE_PRECISE
+        if self.third_dropzone:
+            return FeederAnalysisState.OBJECT_IN_3_DROPZONE
+        if self.second_precise:
+            return FeederAnalysisState.OBJECT_IN_2_DROPZONE_PRECISE
+        if self.second_dropzone:
+            return FeederAnalysisState.OBJECT_IN_2_DROPZONE
+        return FeederAnalysisState.CLEAR
 
 
-def determineObjectChannelAndQuadrant(
-    obj_center_image: Tuple[float, float],
-    geometry: ChannelGeometry,
-) -> Optional[Tuple[int, int]]:
-    # check channel 3 first (innermost)
-    if geometry.third_channel:
-        if isPointInCircle(
-            obj_center_image,
-            geometry.third_channel.center,
-            geometry.third_channel.radius,
-        ):
-            # calculate angle in image space relative to radius1
-            dx = obj_center_image[0] - geometry.third_channel.center[0]
-            dy = obj_center_image[1] - geometry.third_channel.center[1]
-            obj_angle = np.degrees(np.arctan2(dy, dx))
-
-            # relative angle from radius1
-            relative_angle = obj_angle - geometry.third_channel.radius1_angle_image
-            while relative_angle < 0:
-                relative_angle += 360
-            while relative_angle >= 360:
-                relative_angle -= 360
-
-            quadrant = int(relative_angle / 90.0)
-            return (3, quadrant)
-
-    # check channel 2
-    if geometry.second_channel:
-        if isPointInCircle(
-            obj_center_image,
-            geometry.second_channel.center,
-            geometry.second_channel.radius,
-        ):
-            # calculate angle in image space relative to radius1
-            dx = obj_center_image[0] - geometry.second_channel.center[0]
-            dy = obj_center_image[1] - geometry.second_channel.center[1]
-            obj_angle = np.degrees(np.arctan2(dy, dx))
-
-            # relative angle from radius1
-            relative_angle = obj_angle - geometry.second_channel.radius1_angle_image
-            while relative_angle < 0:
-                relative_angle += 360
-            while relative_angle >= 360:
-                relative_angle -= 360
-
-            quadrant = int(relative_angle / 90.0)
-            return (2, quadrant)
-
-    return None
-
-
-def analyzeFeederState(
-    object_detected_masks: List[DetectedMask],
+def analyzeChannelOccupancy(
+    object_tracks: List[Track],
     geometry: ChannelGeometry,
-) -> FeederAnalysisState:
-    if not object_detected_masks:
-        return FeederAnalysisState.CLEAR
-
+) -> ChannelOccupancy:
     # filter objects by confidence threshold
     high_confidence_objects = [
-        dm
-        for dm in object_detected_masks
-        if dm.confidence >= OBJECT_DETECTION_CONFIDENCE_THRESHOLD
+        track
+        for track in object_tracks
+        if track.confidence >= OBJECT_DETECTION_CONFIDENCE_THRESHOLD
     ]
 
-    if not high_confidence_objects:
-        return FeederAnalysisState.CLEAR
-
-    has_object_in_3_dropzone_precise = False
-    has_object_in_3_dropzone = False
-    has_object_in_2_dropzone_precise = False
-    has_object_in_2_dropzone = False
-
-    for obj_dm in high_confidence_objects:
-        center = maskCenterOfMass(obj_dm.mask)
-        if center is None:
-            continue
-
-        result = determineObjectChannelAndQuadrant(center, geometry)
-        if result is None:
-            continue
-
-        channel_id, quadrant = result
-
-        # check for precise mode (quadrant 3) and normal dropzone (quadrants 0, 1)
-        if channel_id == 3:
-            if quadrant == 3:
-                has_object_in_3_dropzone_precise = True
-            elif quadrant in [0, 1]:
-                has_object_in_3_dropzone = True
-
-        if channel_id == 2:
-            if quadrant == 3:
-                has_object_in_2_dropzone_precise = True
-            elif quadrant in [0, 1]:
-                has_object_in_2_dropzone = True
-
-    # return in priority order
-    if has_object_in_3_dropzone_precise:
-        return FeederAnalysisState.OBJECT_IN_3_DROPZONE_PRECISE
-    if has_object_in_3_dropzone:
-        return FeederAnalysisState.OBJECT_IN_3_DROPZONE
-    if has_object_in_2_dropzone_precise:
-        return FeederAnalysisState.OBJECT_IN_2_DROPZONE_PRECISE
-    if has_object_in_2_dropzone:
-        return FeederAnalysisState.OBJECT_IN_2_DROPZONE
-
-    return FeederAnalysisState.CLEAR
+    label_map = geometry.labelMap()
+    if not high_confidence_objects or label_map is None:
+        return ChannelOccupancy()
+
+    # a track that missed this frame is where it's predicted to be by now
+    positions = np.array([track.position for track in high_confidence_objects])
+    occupied = np.bincount(label_map.lookup(positions), minlength=LABEL_COUNT) > 0
+
+    if DROPZONE_MIN_MASK_FRACTION is not None:
+        # a coasting track's mask is from an older frame, it only has its centroid
+        for track in high_confidence_objects:
+            if track.missed == 0:
+                fractions = label_map.maskFractions(track.detection.mask)
+                for channel_id in (2, 3):
+                    for quadrants in (PRECISE_QUADRANTS, DROPZONE_QUADRANTS):
+                        labels = [channelLabel(channel_id, q) for q in quadrants]
+                        if fractions[labels].sum() >= DROPZONE_MIN_MASK_FRACTION:
+                            occupied[labels] = True
+
+    def inZone(channel_id: int, quadrants: Tuple[int, ...]) -> bool:
+        return bool(occupied[[channelLabel(channel_id, q) for q in quadrants]].any())
+
+    return ChannelOccupancy(
+        second_precise=inZone(2, PRECISE_QUADRANTS),
+        second_dropzone=inZone(2, DROPZONE_QUADRANTS),
+        third_precise=inZone(3, PRECISE_QUADRANTS),
+        third_dropzone=inZone(3, DROPZONE_QUADRANTS),
+    )
@@ -4,11 +4,25 @@ from dataclasses import dataclass
 from states.base_state import BaseState
 from subsystems.shared_variables import SharedVariables
 from .states import FeederState
-from .analysis import FeederAnalysisState, analyzeFeederState
+from .analysis import ChannelOccupancy, analyzeChannelOccupancy
+from .rotors import (
+    OccupancyBoard,
+    OccupancySnapshot,
+    RotorController,
+    RotorDecision,
+    RotorSpeedController,
+    RotorSpeedDecision,
+    RotorThread,
+)
 from irl.config import IRLInterface, IRLConfig
-from global_config import GlobalConfig
-from vision import VisionManager
-from defs.consts import FEEDER_OBJECT_CLASS_ID
+from irl.rotor_drive import BoardRotorDrive
+from global_config import GlobalConfig, FeederConfig, FEEDER_MODE_CONTINUOUS
+from vision import VisionManager, CameraFrame
+
+FEEDER_FRAME_WAIT_TIMEOUT_S = 0.5
+ROTOR_STOP_TIMEOUT_S = 1.0
+PROFILE_REPORT_INTERVAL_S = 5.0
+STALE_FRAME_LOG_INTERVAL_S = 5.0
 
 
 @dataclass
@@ -16,11 +30,11 @@ class LoopProfile:
     get_masks_ms: float = 0.0
     get_channels_ms: float = 0.0
     analyze_state_ms: float = 0.0
-    motor_action_ms: float = 0.0
     total_ms: float = 0.0
     num_object_masks: int = 0
     num_carousel_masks: int = 0
     state_result: str = ""
+    frame_age_ms: float = 0.0
 
 
 class LoopProfiler:
@@ -75,11 +89,11 @@ class LoopProfiler:
         print(f"{'Section':<30} {'Latest':>10} {'Avg':>10} {'Max':>10}")
         print("-" * 60)
         fields = [
-            ("get_masks_ms", "getFeederMasksByClass"),
+            ("get_masks_ms", "getFeederTracks"),
             ("get_channels_ms", "getChannelGeometry"),
-            ("analyze_state_ms", "analyzeFeederState"),
-            ("motor_action_ms", "motor action"),
+            ("analyze_state_ms", "analyzeChannelOccupancy"),
             ("total_ms", "TOTAL"),
+            ("frame_age_ms", "frame age at decision"),
         ]
         for field_name, label in fields:
             print(
@@ -93,6 +107,60 @@ class LoopProfiler:
         print("=" * 60 + "\n")
 
 
+def decideFirstRotor(occupancy: ChannelOccupancy, fc: FeederConfig) -> RotorDecision:
+    # channel 1 refills channel 2, only once channel 2's zones are empty
+    if occupancy.second_occupied:
+        return None
+    return "channel 2 clear", fc.first_rotor
+
+
+def decideSecondRotor(occupancy: ChannelOccupancy, fc: FeederConfig) -> RotorDecision:
+    # never drop into channel 3 while it still holds a piece in its zones
+    if occupancy.third_occupied:
+        return None
+    if occupancy.second_precise:
+        return "object in channel 2 quadrant 3", fc.second_rotor_precision
+    if occupancy.second_dropzone:
+        return "object in channel 2 dropzone", fc.second_rotor_normal
+    return None
+
+
+def decideThirdRotor(occupancy: ChannelOccupancy, fc: FeederConfig) -> RotorDecision:
+    if occupancy.third_precise:
+        return "object in channel 3 quadrant 3", fc.third_rotor_precision
+    if occupancy.third_dropzone:
+        return "object in channel 3 dropzone", fc.third_rotor_normal
+    return None
+
+
+def firstRotorSpeed(
+    occupancy: ChannelOccupancy, fc: FeederConfig
+) -> RotorSpeedDecision:
+    if occupancy.second_occupied:
+        return "channel 2 occupied", 0.0
+    if occupancy.third_occupied:
+        return "channel 3 occupied", fc.first_rotor_speed.slow_deg_per_s
+    return "channel 2 clear", fc.first_rotor_speed.cruise_deg_per_s
+
+
+def secondRotorSpeed(
+    occupancy: ChannelOccupancy, fc: FeederConfig
+) -> RotorSpeedDecision:
+    if occupancy.third_occupied:
+        return "channel 3 occupied", 0.0
+    if occupancy.second_precise:
+        return "object in channel 2 quadrant 3", fc.second_rotor_speed.slow_deg_per_s
+    return "channel 3 clear", fc.second_rotor_speed.cruise_deg_per_s
+
+
+def thirdRotorSpeed(
+    occupancy: ChannelOccupancy, fc: FeederConfig
+) -> RotorSpeedDecision:
+    if occupancy.third_precise:
+        return "object in channel 3 quadrant 3", fc.third_rotor_speed.slow_deg_per_s
+    return "channel 3 feeding", fc.third_rotor_speed.cruise_deg_per_s
+
+
 class Feeding(BaseState):
     def __init__(
         self,
@@ -110,6 +178,56 @@ class Feeding(BaseState):
             LoopProfiler(history_size=10) if gc.should_profile_feeder else None
         )
         self.last_analysis_state = None
+        self._last_frame_seq = 0
+        self._refused_stale = 0
+        self._last_stale_log = 0.0
+        self._last_profile_report = 0.0
+        # one analysis per frame, then each rotor runs on its own thread off of it
+        self._board = OccupancyBoard()
+        fc = gc.feeder_config
+        names = ("1st", "2nd", "3rd")
+        self._rotors: List[RotorThread]
+        if fc.mode == FEEDER_MODE_CONTINUOUS:
+            assert irl.rotor_motors is not None
+            self._rotors = [
+                RotorSpeedController(
+                    name,
+                    BoardRotorDrive(motor, speed.accel_deg_per_s2),
+                    lambda occupancy, decide=decide: decide(occupancy, fc),
+                    self._board,
+                    gc,
+                    self._stop_event,
+                    fc.max_frame_age_ms,
+                    fc.speed_interval_ms,
+                )
+                for name, motor, speed, decide in zip(
+                    names,
+                    irl.rotor_motors,
+                    (fc.first_rotor_speed, fc.second_rotor_speed, fc.third_rotor_speed),
+                    (firstRotorSpeed, secondRotorSpeed, thirdRotorSpeed),
+                )
+            ]
+        else:
+            steppers = (
+                irl.first_c_channel_rotor_stepper,
+                irl.second_c_channel_rotor_stepper,
+                irl.third_c_channel_rotor_stepper,
+            )
+            self._rotors = [
+                RotorController(
+                    name,
+                    stepper,
+                    lambda occupancy, decide=decide: decide(occupancy, fc),
+                    self._board,
+                    gc,
+                    self._stop_event,
+                )
+                for name, stepper, decide in zip(
+                    names,
+                    steppers,
+                    (decideFirstRotor, decideSecondRotor, decideThirdRotor),
+                )
+            ]
 
     def step(self) -> Optional[FeederState]:
         self._ensureExecutionThreadStarted()
@@ -119,21 +237,41 @@ class Feeding(BaseState):
         return None
 
     def _executionLoop(self) -> None:
+        for rotor in self._rotors:
+            rotor.start()
+        try:
+            self._analysisLoop()
+        finally:
+            for rotor in self._rotors:
+                rotor.join(ROTOR_STOP_TIMEOUT_S)
+
+    def _analysisLoop(self) -> None:
         fc = self.gc.feeder_config
         irl_cfg = self.irl_config
         prof = self._profiler
 
         while not self._stop_event.is_set():
+            # only re-analyse once inference has produced a newer feeder frame
+            frame = self.vision.waitForFeederResult(
+                self._last_frame_seq, FEEDER_FRAME_WAIT_TIMEOUT_S
+            )
+            if frame is None:
+                continue
+            # only its seq and capture time are used, the pixels aren't needed
+            frame.release()
+            self._last_frame_seq = frame.seq
+            if not self._isFresh(frame, fc.max_frame_age_ms):
+                continue
+
             if prof:
                 prof.startLoop()
                 prof.startSection()
 
-            masks_by_class = self.vision.getFeederMasksByClass()
-            object_detected_masks = masks_by_class.get(FEEDER_OBJECT_CLASS_ID, [])
+            object_tracks = self.vision.getFeederTracks()
 
             if prof:
                 prof.endSection("get_masks_ms")
-                prof.setField("num_object_masks", len(object_detected_masks))
+                prof.setField("num_object_masks", len(object_tracks))
                 prof.startSection()
 
             geometry = self.vision.getChannelGeometry(irl_cfg.aruco_tags)
@@ -142,95 +280,49 @@ class Feeding(BaseState):
                 prof.endSection("get_channels_ms")
                 prof.startSection()
 
-            state = analyzeFeederState(object_detected_masks, geometry)
+            occupancy = analyzeChannelOccupancy(object_tracks, geometry)
+            snapshot = OccupancySnapshot(frame.seq, frame.timestamp, occupancy)
+            self._board.publish(snapshot)
 
+            state = occupancy.state
             if state != self.last_analysis_state:
                 self.gc.logger.info(
-                    f"state change: feeder_analysis {self.last_analysis_state} -> {state}"
+                    f"state change: feeder_analysis {self.last_analysis_state} -> {state} {snapshot.describe()}"
                 )
                 self.last_analysis_state = state
 
             if prof:
                 prof.endSection("analyze_state_ms")
                 prof.setField("state_result", state.value)
-
-            ACTUALLY_RUN = True
-
-            if prof:
-                prof.startSection()
-            if state == FeederAnalysisState.OBJECT_IN_3_DROPZONE_PRECISE:
-                self.gc.logger.info(
-                    "Feeder: object in channel 3 quadrant 3, pulsing 3rd (precise)"
-                )
-                cfg = fc.third_rotor_precision
-                if ACTUALLY_RUN:
-                    self.irl.third_c_channel_rotor_stepper.moveSteps(
-                        -cfg.steps_per_pulse,
-                        cfg.delay_us,
-                        cfg.accel_start_delay_us,
-                        cfg.accel_steps,
-                        cfg.decel_steps,
-                    )
-                if cfg.delay_between_pulse_ms > 0:
-                    time.sleep(cfg.delay_between_pulse_ms / 1000.0)
-            elif state == FeederAnalysisState.OBJECT_IN_3_DROPZONE:
-                self.gc.logger.info("Feeder: object in channel 3 dropzone, pulsing 3rd")
-                cfg = fc.third_rotor_normal
-                if ACTUALLY_RUN:
-                    self.irl.third_c_channel_rotor_stepper.moveSteps(
-                        -cfg.steps_per_pulse,
-                        cfg.delay_us,
-                        cfg.accel_start_delay_us,
-                        cfg.accel_steps,
-                        cfg.decel_steps,
-                    )
-                if cfg.delay_between_pulse_ms > 0:
-                    time.sleep(cfg.delay_between_pulse_ms / 1000.0)
-            elif state == FeederAnalysisState.OBJECT_IN_2_DROPZONE_PRECISE:
-                self.gc.logger.info(
-                    "Feeder: object in channel 2 quadrant 3, pulsing 2nd (precise)"
-                )
-                cfg = fc.second_rotor_precision
-                if ACTUALLY_RUN:
-                    self.irl.second_c_channel_rotor_stepper.moveSteps(
-                        -cfg.steps_per_pulse,
-                        cfg.delay_us,
-                        cfg.accel_start_delay_us,
-                        cfg.accel_steps,
-                        cfg.decel_steps,
-                    )
-                if cfg.delay_between_pulse_ms > 0:
-                    time.sleep(cfg.delay_between_pulse_ms / 1000.0)
-            elif state == FeederAnalysisState.OBJECT_IN_2_DROPZONE:
-                self.gc.logger.info("Feeder: object in channel 2 dropzone, pulsing 2nd")
-                cfg = fc.second_rotor_normal
-                if ACTUALLY_RUN:
-                    self.irl.second_c_channel_rotor_stepper.moveSteps(
-                        -cfg.steps_per_pulse,
-                        cfg.delay_us,
-                        cfg.accel_start_delay_us,
-                        cfg.accel_steps,
-                        cfg.decel_steps,
-                    )
-                if cfg.delay_between_pulse_ms > 0:
-                    time.sleep(cfg.delay_between_pulse_ms / 1000.0)
-            else:
-                self.gc.logger.info("Feeder: clear, pulsing 1st")
-                cfg = fc.first_rotor
-                if ACTUALLY_RUN:
-                    self.irl.first_c_channel_rotor_stepper.moveSteps(
-                        -cfg.steps_per_pulse,
-                        cfg.delay_us,
-                        cfg.accel_start_delay_us,
-                        cfg.accel_steps,
-                        cfg.decel_steps,
-                    )
-                if cfg.delay_between_pulse_ms > 0:
-                    time.sleep(cfg.delay_between_pulse_ms / 1000.0)
-            if prof:
-                prof.endSection("motor_action_ms")
+                prof.setField("frame_age_ms", (time.time() - frame.timestamp) * 1000)
                 prof.endLoop()
-                prof.printReport()
+                # a full report per frame floods the log, print a summary now and then
+                now = time.time()
+                if now - self._last_profile_report >= PROFILE_REPORT_INTERVAL_S:
+                    self._last_profile_report = now
+                    prof.printReport()
+                    self.gc.logger.info(
+                        "Feeder rotors: "
+                        + ", ".join(r.describe() for r in self._rotors)
+                    )
+
+    def _isFresh(self, frame: CameraFrame, max_age_ms: float) -> bool:
+        # refuses frames too old to act on, a newer one is on its way. measured from
+        # when the detections were inferred, which the motion gate may have reused
+        # from an earlier frame. frames from while a rotor was still moving are
+        # refused by that rotor's controller
+        age_ms = (time.time() - frame.detected_at) * 1000
+        if age_ms <= max_age_ms:
+            return True
+        self._refused_stale += 1
+        now = time.time()
+        if now - self._last_stale_log >= STALE_FRAME_LOG_INTERVAL_S:
+            self._last_stale_log = now
+            self.gc.logger.info(
+                f"Feeder: refused frame {frame.seq}, detections {age_ms:.0f}ms old "
+                f"(limit {max_age_ms:.0f}ms, {self._refused_stale} refused so far)"
+            )
+        return False
 
     def cleanup(self) -> None:
         super().cleanup()
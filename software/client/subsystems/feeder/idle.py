@@ -4,14 +4,37 @@ from subsystems.shared_variables import SharedVariables
 from .states import FeederState
 from irl.config import IRLInterface
 from global_config import GlobalConfig
+from vision import VisionManager
 
 
 class Idle(BaseState):
-    def __init__(self, irl: IRLInterface, gc: GlobalConfig, shared: SharedVariables):
+    def __init__(
+        self,
+        irl: IRLInterface,
+        gc: GlobalConfig,
+        shared: SharedVariables,
+        vision: VisionManager,
+    ):
         super().__init__(irl, gc)
         self.shared = shared
+        self.vision = vision
+        self._logged_waiting = False
+        self._logged_error = False
 
     def step(self) -> Optional[FeederState]:
+        error = self.vision.error
+        if error is not None:
+            # inference is gone for good, feeding would only push pieces past unseen
+            if not self._logged_error:
+                self.logger.error(f"Feeder: vision failed, staying idle: {error}")
+                self._logged_error = True
+            return None
+        if not self.vision.is_ready:
+            # pieces fed before the models are warm would go by unseen
+            if not self._logged_waiting:
+                self.logger.info("Feeder: waiting for vision models to warm up")
+                self._logged_waiting = True
+            return None
         if self.shared.classification_ready:
             return FeederState.FEEDING
         return None
@@ -0,0 +1,224 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+from global_config import GlobalConfig, RotorPulseConfig
+from irl.stepper import Stepper
+from irl.rotor_drive import RotorDrive
+from .analysis import ChannelOccupancy
+
+OCCUPANCY_WAIT_TIMEOUT_S = 0.5
+
+
+@dataclass(frozen=True)
+class OccupancySnapshot:
+    seq: int
+    timestamp: float  # capture time of the frame it was analysed from
+    occupancy: ChannelOccupancy
+
+    def describe(self) -> str:
+        age_ms = (time.time() - self.timestamp) * 1000
+        return f"(frame {self.seq}, {age_ms:.0f}ms old)"
+
+
+class OccupancyBoard:
+    # the feeder loop analyses each frame once and posts it here, every rotor
+    # controller reads the same snapshot
+    _cond: threading.Condition
+    _latest: Optional[OccupancySnapshot]
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._latest = None
+
+    def publish(self, snapshot: OccupancySnapshot) -> None:
+        with self._cond:
+            self._latest = snapshot
+            self._cond.notify_all()
+
+    def waitForNewer(
+        self, after_seq: int, captured_after: float, timeout_s: float
+    ) -> Optional[OccupancySnapshot]:
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (
+                    self._latest is not None
+                    and self._latest.seq > after_seq
+                    and self._latest.timestamp >= captured_after
+                ),
+                timeout=timeout_s,
+            )
+            latest = self._latest
+        if (
+            latest is None
+            or latest.seq <= after_seq
+            or latest.timestamp < captured_after
+        ):
+            return None
+        return latest
+
+
+class RotorThread(ABC):
+    # one c-channel rotor driven from its own thread, so a long pause on one rotor
+    # doesn't hold up the others
+    name: str
+    _board: OccupancyBoard
+    _gc: GlobalConfig
+    _stop_event: threading.Event
+    _thread: Optional[threading.Thread]
+    _last_seq: int
+
+    def __init__(
+        self,
+        name: str,
+        board: OccupancyBoard,
+        gc: GlobalConfig,
+        stop_event: threading.Event,
+    ):
+        self.name = name
+        self._board = board
+        self._gc = gc
+        self._stop_event = stop_event
+        self._thread = None
+        self._last_seq = 0
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=f"feeder_{self.name}_rotor", daemon=True
+            )
+            self._thread.start()
+
+    def join(self, timeout_s: float) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+
+    @abstractmethod
+    def describe(self) -> str:
+        pass
+
+    @abstractmethod
+    def _run(self) -> None:
+        pass
+
+
+# what a rotor should do for one snapshot: why and with which pulse, or None to hold
+RotorDecision = Optional[Tuple[str, RotorPulseConfig]]
+
+
+class RotorController(RotorThread):
+    # pulses the rotor when decide() asks for it, only looking at snapshots captured
+    # after its own last pulse settled
+    pulses: int
+    _stepper: Stepper
+    _decide: Callable[[ChannelOccupancy], RotorDecision]
+    _settled_at: float
+
+    def __init__(
+        self,
+        name: str,
+        stepper: Stepper,
+        decide: Callable[[ChannelOccupancy], RotorDecision],
+        board: OccupancyBoard,
+        gc: GlobalConfig,
+        stop_event: threading.Event,
+    ):
+        super().__init__(name, board, gc, stop_event)
+        self.pulses = 0
+        self._stepper = stepper
+        self._decide = decide
+        # frames captured before this moment show the rotor mid-move
+        self._settled_at = 0.0
+
+    def describe(self) -> str:
+        return f"{self.name} {self.pulses} pulses"
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            snapshot = self._board.waitForNewer(
+                self._last_seq, self._settled_at, OCCUPANCY_WAIT_TIMEOUT_S
+            )
+            if snapshot is None:
+                continue
+            self._last_seq = snapshot.seq
+            decision = self._decide(snapshot.occupancy)
+            if decision is None:
+                continue
+            reason, cfg = decision
+            self._gc.logger.info(
+                f"Feeder: {reason}, pulsing {self.name} {snapshot.describe()}"
+            )
+            # the move only gets queued here, it may wait behind other rotors' moves
+            done_at = self._stepper.moveSteps(
+                -cfg.steps_per_pulse,
+                cfg.delay_us,
+                cfg.accel_start_delay_us,
+                cfg.accel_steps,
+                cfg.decel_steps,
+            )
+            self.pulses += 1
+            self._settled_at = done_at + cfg.delay_between_pulse_ms / 1000.0
+
+
+# the speed a rotor should turn at for one snapshot and why, 0 stops it
+RotorSpeedDecision = Tuple[str, float]
+
+
+class RotorSpeedController(RotorThread):
+    # keeps the rotor turning at the speed decide() picks from the newest snapshot.
+    # without a snapshot newer than max_age_ms it stops, it never keeps turning blind
+    speed: float
+    _drive: RotorDrive
+    _decide: Callable[[ChannelOccupancy], RotorSpeedDecision]
+    _max_age_ms: float
+    _interval_s: float
+    _latest: Optional[OccupancySnapshot]
+
+    def __init__(
+        self,
+        name: str,
+        drive: RotorDrive,
+        decide: Callable[[ChannelOccupancy], RotorSpeedDecision],
+        board: OccupancyBoard,
+        gc: GlobalConfig,
+        stop_event: threading.Event,
+        max_age_ms: float,
+        interval_ms: float,
+    ):
+        super().__init__(name, board, gc, stop_event)
+        self.speed = 0.0
+        self._drive = drive
+        self._decide = decide
+        self._max_age_ms = max_age_ms
+        self._interval_s = interval_ms / 1000.0
+        self._latest = None
+
+    def describe(self) -> str:
+        return f"{self.name} {self.speed:.0f}deg/s"
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                snapshot = self._board.waitForNewer(
+                    self._last_seq, 0.0, self._interval_s
+                )
+                if snapshot is not None:
+                    self._last_seq = snapshot.seq
+                    self._latest = snapshot
+                latest = self._latest
+                if latest is None:
+                    continue
+                if (time.time() - latest.timestamp) * 1000 > self._max_age_ms:
+                    reason, speed = "no fresh frame", 0.0
+                else:
+                    reason, speed = self._decide(latest.occupancy)
+                if speed != self.speed:
+                    self._gc.logger.info(
+                        f"Feeder: {reason}, {self.name} at {speed:.0f}deg/s {latest.describe()}"
+                    )
+                    self.speed = speed
+                self._drive.run(speed)
+        finally:
+            self.speed = 0.0
+            self._drive.stop()
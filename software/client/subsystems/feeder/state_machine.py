@@ -24,7 +24,7 @@ class FeederStateMachine(BaseSubsystem):
         self.shared = shared
         self.current_state = FeederState.IDLE
         self.states_map = {
-            FeederState.IDLE: Idle(irl, gc, shared),
+            FeederState.IDLE: Idle(irl, gc, shared, vision),
             FeederState.FEEDING: Feeding(irl, irl_config, gc, shared, vision),
         }
 
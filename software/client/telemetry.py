@@ -5,35 +5,47 @@ import json
 import cv2
 import numpy as np
 import requests
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, TYPE_CHECKING
 
 from global_config import GlobalConfig
 from logger import LogEntry
 
+if TYPE_CHECKING:
+    from vision.types import CameraFrame
+
 
 class Telemetry:
     def __init__(self, gc: GlobalConfig):
         self.gc = gc
 
-    def saveCapture(
-        self,
-        camera_name: str,
-        raw_img,
-        annotated_img,
-        source: str,
-        segmentation_map: Optional[np.ndarray] = None,
-    ) -> None:
+    def saveCapture(self, camera_name: str, frame: "CameraFrame", source: str) -> None:
         if not self.gc.telemetry_enabled:
             return
 
-        seg_copy = segmentation_map.copy() if segmentation_map is not None else None
+        # frame images are never mutated after publishing, so share them instead of copying.
+        # the raw pooled buffer is held until the upload thread has encoded it.
+        frame.retain()
         thread = threading.Thread(
-            target=self._uploadCapture,
-            args=(camera_name, raw_img.copy(), annotated_img.copy(), source, seg_copy),
+            target=self._uploadCaptureFrame,
+            args=(camera_name, frame, source),
             daemon=True,
         )
         thread.start()
 
+    def _uploadCaptureFrame(
+        self, camera_name: str, frame: "CameraFrame", source: str
+    ) -> None:
+        try:
+            self._uploadCapture(
+                camera_name,
+                frame.raw,
+                frame.annotated,
+                source,
+                frame.segmentation_map,
+            )
+        finally:
+            frame.release()
+
     def _uploadCapture(
         self,
         camera_name: str,
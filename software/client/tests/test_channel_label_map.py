@@ -0,0 +1,109 @@
+import numpy as np
+from subsystems.feeder.analysis import (
+    LABEL_MAP_SCALE,
+    ChannelGeometry,
+    CircularChannel,
+    analyzeChannelOccupancy,
+    buildChannelLabelMap,
+    channelLabel,
+)
+from vision.tracker import Track
+from vision.types import CompactMask, DetectedMask
+
+SECOND = CircularChannel(2, (200.0, 150.0), 120.0, 30.0)
+THIRD = CircularChannel(3, (230.0, 160.0), 60.0, -100.0)
+GEOMETRY = ChannelGeometry(second_channel=SECOND, third_channel=THIRD)
+
+
+def referenceLabel(x: float, y: float) -> int:
+    # point in circle then the quadrant from radius1, channel 3 (innermost) first
+    for ch in (THIRD, SECOND):
+        dx, dy = x - ch.center[0], y - ch.center[1]
+        if dx * dx + dy * dy <= ch.radius * ch.radius:
+            angle = (np.degrees(np.arctan2(dy, dx)) - ch.radius1_angle_image) % 360.0
+            return channelLabel(ch.channel_id, min(int(angle / 90.0), 3))
+    return 0
+
+
+def test_no_channels_gives_no_map():
+    assert buildChannelLabelMap(ChannelGeometry(None, None)) is None
+
+
+def test_lookup_matches_point_in_circle_at_cell_centres():
+    label_map = buildChannelLabelMap(GEOMETRY)
+    assert label_map is not None
+    h, w = label_map.labels.shape
+    cols, rows = np.meshgrid(np.arange(0, w, 3), np.arange(0, h, 3))
+    points = np.stack(
+        [
+            label_map.origin[0] + (cols.ravel() + 0.5) * LABEL_MAP_SCALE,
+            label_map.origin[1] + (rows.ravel() + 0.5) * LABEL_MAP_SCALE,
+        ],
+        axis=1,
+    )
+    expected = [referenceLabel(x, y) for x, y in points]
+    assert list(label_map.lookup(points)) == expected
+    # every quadrant of both channels shows up
+    assert {channelLabel(c, q) for c in (2, 3) for q in range(4)} <= set(expected)
+
+
+def test_points_outside_the_map_are_unlabelled():
+    label_map = buildChannelLabelMap(GEOMETRY)
+    assert label_map is not None
+    points = np.array([[-50.0, -50.0], [1000.0, 150.0], [200.0, 5000.0]])
+    assert list(label_map.lookup(points)) == [0, 0, 0]
+
+
+def test_mask_fractions():
+    label_map = buildChannelLabelMap(GEOMETRY)
+    assert label_map is not None
+    dense = np.zeros((400, 500), dtype=bool)
+    # half the mask inside channel 3 near its centre, half far outside every channel
+    dense[150:170, 220:240] = True
+    dense[380:400, 480:500] = True
+    fractions = label_map.maskFractions(CompactMask.fromDense(dense))
+    assert np.isclose(fractions.sum(), 1.0)
+    assert np.isclose(fractions[0], 0.5)
+    assert np.isclose(fractions[[channelLabel(3, q) for q in range(4)]].sum(), 0.5)
+
+
+def trackAt(x: float, y: float, missed: int = 0) -> Track:
+    mask = np.zeros((400, 500), dtype=bool)
+    mask[int(y) - 2 : int(y) + 2, int(x) - 2 : int(x) + 2] = True
+    return Track(
+        track_id=1,
+        detection=DetectedMask(CompactMask.fromDense(mask), 0.9, 0, 1),
+        position=(x, y),
+        velocity=(0.0, 0.0),
+        box=(x - 2, y - 2, x + 2, y + 2),
+        timestamp=0.0,
+        missed=missed,
+    )
+
+
+def pointIn(channel: CircularChannel, quadrant: int) -> tuple:
+    # middle of the quadrant, halfway out, clear of the other channel
+    angle = np.radians(channel.radius1_angle_image + quadrant * 90.0 + 45.0)
+    r = channel.radius * (0.9 if channel is SECOND else 0.5)
+    return (
+        channel.center[0] + r * np.cos(angle),
+        channel.center[1] + r * np.sin(angle),
+    )
+
+
+def test_occupancy_zones():
+    assert analyzeChannelOccupancy([], GEOMETRY) == analyzeChannelOccupancy(
+        [trackAt(5.0, 5.0)], GEOMETRY
+    )
+    for channel in (SECOND, THIRD):
+        x, y = pointIn(channel, 0)
+        assert referenceLabel(x, y) == channelLabel(channel.channel_id, 0)
+        occupancy = analyzeChannelOccupancy([trackAt(x, y)], GEOMETRY)
+        if channel is SECOND:
+            assert occupancy.second_dropzone and not occupancy.third_occupied
+        else:
+            assert occupancy.third_dropzone and not occupancy.second_occupied
+    x, y = pointIn(THIRD, 3)
+    assert analyzeChannelOccupancy([trackAt(x, y)], GEOMETRY).third_precise
+    # a coasting track still holds its channel
+    assert analyzeChannelOccupancy([trackAt(x, y, missed=1)], GEOMETRY).third_precise
@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+from vision.types import CompactMask
+
+FRAME_SHAPE = (120, 160)
+
+
+def blob(shape=FRAME_SHAPE) -> np.ndarray:
+    mask = np.zeros(shape, dtype=bool)
+    mask[30:50, 40:75] = True
+    mask[45:60, 60:70] = True
+    return mask
+
+
+def test_from_dense_keeps_only_the_bounding_window():
+    dense = blob()
+    mask = CompactMask.fromDense(dense)
+    assert mask.bbox == (40, 30, 75, 60)
+    assert mask.crop.shape == (30, 35)
+    assert np.array_equal(mask.toDense(), dense)
+
+
+def test_packed_matches_unpacked():
+    dense = blob()
+    packed = CompactMask.fromDense(dense, packed=True)
+    assert np.array_equal(packed.crop, CompactMask.fromDense(dense).crop)
+    assert np.array_equal(packed.toDense(), dense)
+
+
+def test_empty_mask():
+    mask = CompactMask.fromDense(np.zeros(FRAME_SHAPE, dtype=bool))
+    assert mask.area == 0
+    assert mask.centroid is None
+    assert not mask.toDense().any()
+    assert mask.dilated(3) is mask
+
+
+def test_area_and_centroid_match_dense_moments():
+    dense = blob()
+    mask = CompactMask.fromDense(dense)
+    ys, xs = np.nonzero(dense)
+    assert mask.area == len(xs)
+    centroid = mask.centroid
+    assert centroid is not None
+    assert np.allclose(centroid, (xs.mean(), ys.mean()))
+
+
+def test_window_outside_the_crop_is_empty():
+    mask = CompactMask.fromDense(blob())
+    assert not mask.window((0, 0, 20, 20)).any()
+    window = mask.window((35, 25, 80, 65))
+    assert np.array_equal(window, blob()[25:65, 35:80])
+
+
+def test_dilated_matches_full_frame_dilation():
+    dense = blob()
+    for px in (1, 4):
+        kernel = np.ones((px * 2 + 1, px * 2 + 1), np.uint8)
+        expected = cv2.dilate(dense.astype(np.uint8), kernel).astype(bool)
+        assert np.array_equal(
+            CompactMask.fromDense(dense).dilated(px).toDense(), expected
+        )
+
+
+def test_dilated_is_clipped_to_the_grid():
+    dense = np.zeros(FRAME_SHAPE, dtype=bool)
+    dense[0:5, 0:5] = True
+    grown = CompactMask.fromDense(dense).dilated(3)
+    assert grown.bbox == (0, 0, 8, 8)
+
+
+def test_from_scaled_matches_nearest_resize():
+    # a model resolution mask covering a crop of the frame
+    low = np.zeros((24, 32), dtype=bool)
+    low[5:12, 8:20] = True
+    low[10:15, 18:22] = True
+    region = (20, 10, 116, 82)
+    mask = CompactMask.fromScaled(low, region, FRAME_SHAPE)
+    expected = np.zeros(FRAME_SHAPE, dtype=bool)
+    expected[region[1] : region[3], region[0] : region[2]] = cv2.resize(
+        low.astype(np.uint8),
+        (region[2] - region[0], region[3] - region[1]),
+        interpolation=cv2.INTER_NEAREST,
+    ).astype(bool)
+    assert np.array_equal(mask.toDense(), expected)
+
+
+def test_on_grid_maps_a_coarse_mask_to_frame_pixels():
+    # a 2x coarser grid offset by (10, 20) frame pixels
+    coarse = np.zeros((40, 50), dtype=bool)
+    coarse[5:10, 10:15] = True
+    mask = CompactMask.fromDense(coarse, grid=(10.0, 20.0, 2.0, 2.0))
+    assert mask.frame_box == (30.0, 30.0, 40.0, 40.0)
+    on_frame = mask.onGrid((0.0, 0.0, 1.0, 1.0), FRAME_SHAPE)
+    assert on_frame.bbox == (30, 30, 40, 40)
+    assert on_frame.area == 100
@@ -0,0 +1,89 @@
+import numpy as np
+from vision.frame_pool import FramePool
+from vision.types import CameraFrame
+
+SHAPE = (4, 4, 3)
+
+
+def test_acquire_hands_out_retained_buffers():
+    pool = FramePool(SHAPE, 2)
+    a = pool.acquire()
+    b = pool.acquire()
+    assert a is not b
+    assert a._refs == 1 and b._refs == 1
+    assert pool.allocated == 2
+
+
+def test_release_returns_buffer_once_unreferenced():
+    pool = FramePool(SHAPE, 1)
+    buf = pool.acquire()
+    buf.retain()
+    buf.release()
+    assert pool._free == []
+    buf.release()
+    assert pool._free == [buf]
+    assert pool.acquire() is buf
+
+
+def test_pool_grows_instead_of_reusing_a_held_buffer():
+    pool = FramePool(SHAPE, 1)
+    held = pool.acquire()
+    extra = pool.acquire()
+    assert extra is not held
+    assert pool.allocated == 2
+    extra.release()
+    assert pool.acquire() is extra
+    assert pool.allocated == 2
+
+
+def test_generation_bumps_on_every_acquire():
+    pool = FramePool(SHAPE, 1)
+    buf = pool.acquire()
+    first = buf.generation
+    buf.release()
+    assert pool.acquire() is buf
+    assert buf.generation == first + 1
+
+
+def test_retain_if_current():
+    pool = FramePool(SHAPE, 1)
+    buf = pool.acquire()
+    generation = buf.generation
+    assert buf.retainIfCurrent(generation)
+    assert buf._refs == 2
+    buf.release()
+    buf.release()
+    # released to the pool, nothing left to retain
+    assert not buf.retainIfCurrent(generation)
+    pool.acquire()
+    # handed out again for a newer frame
+    assert not buf.retainIfCurrent(generation)
+    assert buf._refs == 1
+
+
+def test_lazy_render_skipped_once_buffer_recycled():
+    pool = FramePool(SHAPE, 1)
+    buf = pool.acquire()
+    buf.array[:] = 1
+    renders = []
+
+    def render():
+        renders.append(buf._refs)
+        return frame.raw.copy()
+
+    frame = CameraFrame(
+        buf.readOnlyView(), None, [], 0.0, buffer=buf, render_annotated=render
+    )
+    assert frame.annotated is not None
+    assert np.all(frame.annotated == 1)
+    # the render held its own retain, and gave it back
+    assert renders == [2]
+    assert buf._refs == 1
+
+    stale = CameraFrame(
+        buf.readOnlyView(), None, [], 0.0, buffer=buf, render_annotated=render
+    )
+    buf.release()
+    pool.acquire()
+    assert stale.annotated is None
+    assert renders == [2]
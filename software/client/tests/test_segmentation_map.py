@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+from vision.inference import buildSegmentationMap
+from vision.types import Detections
+
+FRAME_SHAPE = (90, 120, 3)
+
+
+def detections(masks: np.ndarray, class_ids, region=None) -> Detections:
+    n = len(class_ids)
+    return Detections(
+        class_ids=np.array(class_ids, dtype=np.int32),
+        confidences=np.ones(n, dtype=np.float32),
+        boxes=np.zeros((n, 4), dtype=np.float32),
+        masks=masks,
+        names={},
+        mask_region=region,
+    )
+
+
+def perMaskMap(masks: np.ndarray, class_ids, shape, region=None) -> np.ndarray:
+    # each mask resized on its own and painted in order, the last one wins
+    x1, y1, x2, y2 = region or (0, 0, shape[1], shape[0])
+    out = np.zeros(shape[:2], dtype=np.uint8)
+    for mask, class_id in zip(masks, class_ids):
+        scaled = cv2.resize(
+            mask.astype(np.uint8), (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST
+        ).astype(bool)
+        out[y1:y2, x1:x2][scaled] = class_id
+    return out
+
+
+def sampleMasks() -> np.ndarray:
+    masks = np.zeros((3, 30, 40), dtype=bool)
+    masks[0, 2:20, 3:25] = True
+    masks[1, 10:28, 15:38] = True
+    masks[2, 5:12, 5:12] = True
+    return masks
+
+
+def test_no_masks_gives_no_map():
+    empty = detections(np.zeros((0, 30, 40), dtype=bool), [])
+    assert buildSegmentationMap(empty, FRAME_SHAPE) is None
+
+
+def test_matches_painting_masks_one_by_one():
+    masks = sampleMasks()
+    class_ids = [1, 2, 3]
+    result = buildSegmentationMap(detections(masks, class_ids), FRAME_SHAPE)
+    assert result is not None
+    assert result.dtype == np.uint8
+    assert np.array_equal(result, perMaskMap(masks, class_ids, FRAME_SHAPE))
+
+
+def test_masks_of_a_crop_only_cover_their_region():
+    masks = sampleMasks()
+    class_ids = [2, 1, 4]
+    region = (20, 10, 100, 70)
+    result = buildSegmentationMap(detections(masks, class_ids, region), FRAME_SHAPE)
+    assert result is not None
+    assert result.shape == FRAME_SHAPE[:2]
+    assert np.array_equal(result, perMaskMap(masks, class_ids, FRAME_SHAPE, region))
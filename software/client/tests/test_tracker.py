@@ -0,0 +1,80 @@
+import numpy as np
+from vision.tracker import CentroidTracker, TRACK_MAX_MISSED_FRAMES, TRACK_MIN_HITS
+from vision.types import CompactMask, DetectedMask
+
+FRAME_SHAPE = (200, 300)
+
+
+def piece(x: int, y: int, size: int = 10, confidence: float = 0.9) -> DetectedMask:
+    mask = np.zeros(FRAME_SHAPE, dtype=bool)
+    mask[y : y + size, x : x + size] = True
+    return DetectedMask(
+        mask=CompactMask.fromDense(mask),
+        confidence=confidence,
+        class_id=0,
+        instance_id=0,
+    )
+
+
+def confirmed(tracker: CentroidTracker, detections, start: float = 0.0):
+    tracks = []
+    for i in range(TRACK_MIN_HITS):
+        tracks = tracker.update(detections, start + i * 0.1)
+    return tracks
+
+
+def test_new_track_reported_after_min_hits():
+    tracker = CentroidTracker()
+    assert TRACK_MIN_HITS > 1
+    assert tracker.update([piece(50, 50)], 0.0) == []
+    tracks = confirmed(tracker, [piece(50, 50)], 0.1)
+    assert len(tracks) == 1
+    assert tracks[0].hits >= TRACK_MIN_HITS
+
+
+def test_single_spurious_detection_never_reported():
+    tracker = CentroidTracker()
+    assert tracker.update([piece(50, 50)], 0.0) == []
+    for i in range(TRACK_MAX_MISSED_FRAMES + 1):
+        assert tracker.update([], 0.1 * (i + 1)) == []
+
+
+def test_moving_piece_keeps_its_id_and_velocity():
+    tracker = CentroidTracker()
+    tracks = []
+    for i in range(5):
+        tracks = tracker.update([piece(50 + 10 * i, 50)], 0.1 * i)
+    assert len(tracks) == 1
+    track = tracks[0]
+    assert track.detection.instance_id == track.track_id
+    assert track.velocity[0] > 50  # about 100px/s
+    assert abs(track.velocity[1]) < 1e-6
+
+
+def test_fast_small_piece_matched_by_distance():
+    tracker = CentroidTracker()
+    tracker.update([piece(50, 50, size=4)], 0.0)
+    # boxes don't overlap, the centroid is still close enough
+    tracks = tracker.update([piece(80, 50, size=4)], 0.1)
+    assert len(tracks) == 1
+
+
+def test_missed_track_coasts_then_drops():
+    tracker = CentroidTracker()
+    for i in range(3):
+        tracker.update([piece(50 + 10 * i, 50)], 0.1 * i)
+    t = 0.2
+    for missed in range(1, TRACK_MAX_MISSED_FRAMES + 1):
+        t += 0.1
+        tracks = tracker.update([], t)
+        assert len(tracks) == 1
+        assert tracks[0].missed == missed
+        # predicted forward along its velocity
+        assert tracks[0].position[0] > 75
+    assert tracker.update([], t + 0.1) == []
+
+
+def test_two_pieces_get_distinct_ids():
+    tracker = CentroidTracker()
+    tracks = confirmed(tracker, [piece(20, 20), piece(200, 150)])
+    assert len({t.track_id for t in tracks}) == 2
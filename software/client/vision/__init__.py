@@ -1,2 +1,3 @@
 from .vision_manager import VisionManager
 from .types import VisionResult, CameraFrame
+from .model_registry import ModelRegistry, mkModelRegistry
@@ -0,0 +1,163 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import cv2
+import cv2.aruco as aruco
+import numpy as np
+
+from .types import CameraFrame, Region
+
+# the feeder loop and the ui can be a frame apart, keep both frames' results
+ARUCO_DETECTION_CACHE_FRAMES = 2
+# the channel tags are fixed to the machine. their positions are the median over this
+# many frames, then only small windows around them are re-checked now and then
+TAG_LOCK_SAMPLES = 30
+TAG_REVALIDATE_INTERVAL_S = 10.0
+TAG_REVALIDATE_WINDOW_PX = 100  # half size of the window around each tag
+# a tag found this far from its locked position has moved, the camera was bumped once
+# that's seen in this many checks in a row
+TAG_MOVED_PX = 8.0
+TAG_MOVED_CHECKS = 2
+
+
+@dataclass(frozen=True)
+class ArucoDetection:
+    corners: Sequence[np.ndarray]
+    ids: Optional[np.ndarray]
+    centers: Dict[int, Tuple[float, float]]
+
+
+class ArucoTagDetector:
+    # one detector for the feeder camera, detection runs at most once per frame seq
+    # however many callers (feeder loop, ui overlay, channel geometry) ask for it
+    _detector: aruco.ArucoDetector
+    _cache: "OrderedDict[int, ArucoDetection]"
+    _lock: threading.Lock
+
+    def __init__(self):
+        self._detector = aruco.ArucoDetector(
+            aruco.getPredefinedDictionary(aruco.DICT_ARUCO_ORIGINAL),
+            aruco.DetectorParameters(),
+        )
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def detect(self, frame: CameraFrame) -> ArucoDetection:
+        # held for the detection too, so two callers on a new frame don't both run it
+        with self._lock:
+            cached = self._cache.get(frame.seq)
+            if cached is not None:
+                return cached
+
+            gray = cv2.cvtColor(frame.raw, cv2.COLOR_BGR2GRAY)
+            corners, ids, _ = self._detector.detectMarkers(gray)
+            centers: Dict[int, Tuple[float, float]] = {}
+            if ids is not None:
+                for i, tag_id in enumerate(ids.flatten()):
+                    tag_corners = corners[i][0]
+                    centers[int(tag_id)] = (
+                        float(np.mean(tag_corners[:, 0])),
+                        float(np.mean(tag_corners[:, 1])),
+                    )
+            detection = ArucoDetection(corners=corners, ids=ids, centers=centers)
+
+            self._cache[frame.seq] = detection
+            while len(self._cache) > ARUCO_DETECTION_CACHE_FRAMES:
+                self._cache.popitem(last=False)
+            return detection
+
+    def detectInWindows(
+        self, frame: CameraFrame, windows: Dict[int, Region]
+    ) -> Dict[int, Tuple[float, float]]:
+        # centres of the tags found in their own window, in frame coordinates
+        h, w = frame.raw.shape[:2]
+        centers: Dict[int, Tuple[float, float]] = {}
+        with self._lock:
+            for tag_id, (x1, y1, x2, y2) in windows.items():
+                x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+                if x2 <= x1 or y2 <= y1:
+                    continue
+                gray = cv2.cvtColor(frame.raw[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+                corners, ids, _ = self._detector.detectMarkers(gray)
+                if ids is None:
+                    continue
+                for i, found_id in enumerate(ids.flatten()):
+                    if int(found_id) == tag_id:
+                        tag_corners = corners[i][0]
+                        centers[tag_id] = (
+                            x1 + float(np.mean(tag_corners[:, 0])),
+                            y1 + float(np.mean(tag_corners[:, 1])),
+                        )
+        return centers
+
+
+class TagPositionLock:
+    # solves where the fixed tags are from many frames, then holds those positions.
+    # afterwards only windows around them are re-checked at a low rate, and the lock is
+    # dropped to sample again if the tags moved (a bumped camera)
+    locked: Optional[Dict[int, Tuple[float, float]]]
+    _tag_ids: List[int]
+    _detector: ArucoTagDetector
+    _samples: Dict[int, List[Tuple[float, float]]]
+    _last_sampled_seq: int
+    _last_check: float
+    _moved_checks: int
+
+    def __init__(self, tag_ids: List[int], detector: ArucoTagDetector):
+        self.locked = None
+        self._tag_ids = tag_ids
+        self._detector = detector
+        self._samples = {tag_id: [] for tag_id in tag_ids}
+        self._last_sampled_seq = -1
+        self._last_check = 0.0
+        self._moved_checks = 0
+
+    def update(self, frame: CameraFrame, now: float) -> bool:
+        # True when the lock changed, it was just taken or just dropped
+        if self.locked is None:
+            return self._sample(frame, now)
+        if now - self._last_check < TAG_REVALIDATE_INTERVAL_S:
+            return False
+        self._last_check = now
+        return self._revalidate(frame)
+
+    def _sample(self, frame: CameraFrame, now: float) -> bool:
+        if frame.seq == self._last_sampled_seq:
+            return False
+        self._last_sampled_seq = frame.seq
+        centers = self._detector.detect(frame).centers
+        for tag_id in self._tag_ids:
+            if tag_id in centers:
+                self._samples[tag_id].append(centers[tag_id])
+        if any(len(s) < TAG_LOCK_SAMPLES for s in self._samples.values()):
+            return False
+        self.locked = {}
+        for tag_id, samples in self._samples.items():
+            median = np.median(np.array(samples), axis=0)
+            self.locked[tag_id] = (float(median[0]), float(median[1]))
+        self._last_check = now
+        self._moved_checks = 0
+        return True
+
+    def _revalidate(self, frame: CameraFrame) -> bool:
+        assert self.locked is not None
+        r = TAG_REVALIDATE_WINDOW_PX
+        windows = {
+            tag_id: (int(x) - r, int(y) - r, int(x) + r, int(y) + r)
+            for tag_id, (x, y) in self.locked.items()
+        }
+        found = self._detector.detectInWindows(frame, windows)
+        # one missing tag is most likely covered by a piece, but none of them where
+        # they should be means the camera moved further than the windows reach
+        moved = not found or any(
+            np.hypot(x - self.locked[tag_id][0], y - self.locked[tag_id][1])
+            > TAG_MOVED_PX
+            for tag_id, (x, y) in found.items()
+        )
+        self._moved_checks = self._moved_checks + 1 if moved else 0
+        if self._moved_checks < TAG_MOVED_CHECKS:
+            return False
+        self.locked = None
+        self._samples = {tag_id: [] for tag_id in self._tag_ids}
+        return True
@@ -0,0 +1,89 @@
+import hashlib
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from ultralytics import YOLO
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKEND_OPENVINO = "openvino"
+BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_OPENVINO)
+EXPORT_CACHE_DIR = Path(__file__).resolve().parent.parent / "blob" / "model_exports"
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def weightsHash(model_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def calibrationHash(int8_data: str) -> str:
+    # the yaml's contents when it's a local file, else the name ultralytics resolves
+    if Path(int8_data).is_file():
+        return weightsHash(int8_data)
+    return hashlib.sha256(int8_data.encode()).hexdigest()
+
+
+def _artifactIn(directory: Path) -> Path:
+    # each cache entry holds exactly the one file or directory ultralytics exported
+    return next(directory.iterdir())
+
+
+@dataclass
+class ModelBackend:
+    # how a binding's .pt weights are run. anything other than torch is exported once
+    # through ultralytics and loaded back as a YOLO, so predict/track stay the same
+    name: str = BACKEND_TORCH
+    int8: bool = False
+    # dataset yaml used to calibrate int8, ultralytics' default when None
+    int8_data: Optional[str] = None
+
+    def cacheKey(self, model_path: str) -> str:
+        suffix = ""
+        if self.int8:
+            suffix = "_int8"
+            # calibrating on another dataset gives another export
+            if self.int8_data:
+                suffix += f"_{calibrationHash(self.int8_data)[:8]}"
+        return f"{weightsHash(model_path)[:16]}_{self.name}{suffix}"
+
+    def export(self, model_path: str, cache_dir: Path = EXPORT_CACHE_DIR) -> Path:
+        # keyed by the weights' hash, so retrained weights at the same path re-export
+        target = cache_dir / self.cacheKey(model_path)
+        if target.exists():
+            return _artifactIn(target)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+            weights = Path(tmp) / Path(model_path).name
+            shutil.copyfile(model_path, weights)
+            # dynamic so roi crops and batches can use their own input size
+            kwargs = {"format": self.name, "dynamic": True}
+            if self.int8:
+                kwargs["int8"] = True
+                if self.int8_data:
+                    kwargs["data"] = self.int8_data
+            exported = Path(YOLO(str(weights)).export(**kwargs))
+
+            staging = Path(tmp) / "export"
+            staging.mkdir()
+            shutil.move(str(exported), str(staging / exported.name))
+            # rename so an interrupted export never leaves a half written entry behind
+            try:
+                staging.rename(target)
+            except OSError:
+                if not target.exists():
+                    raise
+        return _artifactIn(target)
+
+    def load(self, model_path: str) -> YOLO:
+        if self.name == BACKEND_TORCH:
+            return YOLO(model_path)
+        if self.name not in BACKENDS:
+            raise ValueError(f"unknown inference backend: {self.name}")
+        return YOLO(str(self.export(model_path)))
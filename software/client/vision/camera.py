@@ -1,10 +1,16 @@
 import threading
 import time
-from typing import Optional
+from collections import deque
+from typing import Deque, List, Optional
 import cv2
 
 from irl.config import CameraConfig
 from .types import CameraFrame
+from .frame_pool import FramePool
+
+FRAME_RING_SIZE = 4
+# ring + the binding's latest result + a few in-flight consumers
+FRAME_POOL_SIZE = FRAME_RING_SIZE + 4
 
 
 class CaptureThread:
@@ -12,16 +18,90 @@ class CaptureThread:
     _stop_event: threading.Event
     _config: CameraConfig
     _cap: Optional[cv2.VideoCapture]
-    latest_frame: Optional[CameraFrame]
+    _frames: Deque[CameraFrame]
+    _frame_cond: threading.Condition
+    _frame_listeners: List[threading.Event]
+    _latest_seq: int
+    _pool: FramePool
+    _idle_fps: Optional[float]
+    _triggered_until: float
+    _last_publish_time: float
     name: str
 
-    def __init__(self, name: str, config: CameraConfig):
+    def __init__(
+        self,
+        name: str,
+        config: CameraConfig,
+        shared_memory: bool = False,
+        idle_fps: Optional[float] = None,
+    ):
         self.name = name
         self._config = config
         self._thread = None
         self._stop_event = threading.Event()
         self._cap = None
-        self.latest_frame = None
+        self._frames = deque(maxlen=FRAME_RING_SIZE)
+        self._frame_cond = threading.Condition()
+        self._frame_listeners = []
+        self._latest_seq = 0
+        # shared memory frames let an out-of-process inference worker read them without a copy
+        self._pool = FramePool(
+            (config.height, config.width, 3), FRAME_POOL_SIZE, shared=shared_memory
+        )
+        # with idle_fps set the camera keeps grabbing but only decodes and publishes at
+        # that rate (0 = not at all) until trigger() asks for full rate
+        self._idle_fps = idle_fps
+        self._triggered_until = 0.0
+        self._last_publish_time = 0.0
+
+    @property
+    def latest_frame(self) -> Optional[CameraFrame]:
+        with self._frame_cond:
+            return self._frames[-1] if self._frames else None
+
+    @property
+    def triggered(self) -> bool:
+        return self._idle_fps is None or time.time() < self._triggered_until
+
+    def trigger(self, duration_s: float) -> None:
+        self._triggered_until = max(self._triggered_until, time.time() + duration_s)
+
+    def retainLatestFrame(self) -> Optional[CameraFrame]:
+        # latest frame with its buffer already retained, so the ring can't recycle it
+        # before the caller gets to it. caller must release()
+        with self._frame_cond:
+            if not self._frames:
+                return None
+            frame = self._frames[-1]
+            frame.retain()
+            return frame
+
+    @property
+    def latest_seq(self) -> int:
+        with self._frame_cond:
+            return self._latest_seq
+
+    def addFrameListener(self, event: threading.Event) -> None:
+        # event is set every time a new frame is published, lets one thread wait on several cameras
+        self._frame_listeners.append(event)
+
+    def waitForFrame(
+        self, after_seq: int, timeout: Optional[float] = None
+    ) -> Optional[CameraFrame]:
+        # blocks until a frame newer than after_seq exists, returns the newest one or None on timeout
+        with self._frame_cond:
+            has_frame = self._frame_cond.wait_for(
+                lambda: self._latest_seq > after_seq or self._stop_event.is_set(),
+                timeout,
+            )
+            if not has_frame or self._latest_seq <= after_seq:
+                return None
+            return self._frames[-1]
+
+    def getFramesSince(self, after_seq: int) -> List[CameraFrame]:
+        # frames still in the ring with seq > after_seq, oldest first
+        with self._frame_cond:
+            return [f for f in self._frames if f.seq > after_seq]
 
     def start(self) -> None:
         self._stop_event.clear()
@@ -30,8 +110,31 @@ class CaptureThread:
 
     def stop(self) -> None:
         self._stop_event.set()
+        with self._frame_cond:
+            self._frame_cond.notify_all()
         if self._thread:
             self._thread.join(timeout=2.0)
+        self._pool.close()
+
+    def _publishFrame(self, frame: CameraFrame) -> None:
+        with self._frame_cond:
+            self._latest_seq += 1
+            frame.seq = self._latest_seq
+            if len(self._frames) == FRAME_RING_SIZE:
+                self._frames.popleft().release()
+            self._frames.append(frame)
+            self._last_publish_time = frame.timestamp
+            self._frame_cond.notify_all()
+        for listener in self._frame_listeners:
+            listener.set()
+
+    def _shouldDecode(self) -> bool:
+        if self.triggered:
+            return True
+        assert self._idle_fps is not None
+        if self._idle_fps <= 0:
+            return False
+        return time.time() - self._last_publish_time >= 1.0 / self._idle_fps
 
     def _captureLoop(self) -> None:
         cap = cv2.VideoCapture(self._config.device_index)
@@ -41,13 +144,30 @@ class CaptureThread:
         cap.set(cv2.CAP_PROP_FPS, self._config.fps)
 
         while not self._stop_event.is_set():
-            ret, frame = cap.read()
-            if ret:
-                self.latest_frame = CameraFrame(
-                    raw=frame, annotated=None, results=[], timestamp=time.time()
-                )
-            else:
+            # always grab so the driver queue stays fresh, decoding is what costs CPU
+            if not cap.grab():
+                time.sleep(0.01)
+                continue
+            if not self._shouldDecode():
+                continue
+            buf = self._pool.acquire()
+            ret, frame = cap.retrieve(image=buf.array)
+            if not ret:
+                buf.release()
                 time.sleep(0.01)
+                continue
+            if frame is not buf.array:
+                # camera delivered a different size than configured, adopt its buffer
+                buf.array = frame
+            self._publishFrame(
+                CameraFrame(
+                    raw=buf.readOnlyView(),
+                    annotated=None,
+                    results=[],
+                    timestamp=time.time(),
+                    buffer=buf,
+                )
+            )
 
         cap.release()
         self._cap = None
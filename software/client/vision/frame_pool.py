@@ -0,0 +1,108 @@
+import threading
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+class PooledBuffer:
+    array: np.ndarray
+    # bumped every time the pool hands the buffer out again
+    generation: int
+    _pool: "FramePool"
+    _refs: int
+    _shm: Optional[shared_memory.SharedMemory]
+    _shm_array: Optional[np.ndarray]
+
+    def __init__(
+        self,
+        pool: "FramePool",
+        array: np.ndarray,
+        shm: Optional[shared_memory.SharedMemory] = None,
+    ):
+        self._pool = pool
+        self.array = array
+        self._refs = 0
+        self.generation = 0
+        self._shm = shm
+        self._shm_array = array if shm is not None else None
+
+    @property
+    def shared_name(self) -> Optional[str]:
+        # name of the shared memory segment holding array, None if the frame lives in private memory
+        if self._shm is None or self.array is not self._shm_array:
+            return None
+        return self._shm.name
+
+    def readOnlyView(self) -> np.ndarray:
+        view = self.array.view()
+        view.flags.writeable = False
+        return view
+
+    def retain(self) -> None:
+        with self._pool._lock:
+            self._refs += 1
+
+    def retainIfCurrent(self, generation: int) -> bool:
+        # retain only if the buffer still holds the frame it was handed out for
+        with self._pool._lock:
+            if self._refs == 0 or self.generation != generation:
+                return False
+            self._refs += 1
+            return True
+
+    def release(self) -> None:
+        with self._pool._lock:
+            self._refs -= 1
+            if self._refs == 0:
+                self._pool._free.append(self)
+
+
+class FramePool:
+    # fixed set of frame buffers that are recycled once nobody references them.
+    # if every buffer is still held the pool grows instead of overwriting a live frame.
+    # with shared=True buffers live in shared memory so another process can read them in place.
+    _lock: threading.Lock
+    _free: List[PooledBuffer]
+    _buffers: List[PooledBuffer]
+    _shape: Tuple[int, ...]
+    _shared: bool
+    allocated: int
+
+    def __init__(self, shape: Tuple[int, ...], size: int, shared: bool = False):
+        self._lock = threading.Lock()
+        self._shape = shape
+        self._shared = shared
+        self._buffers = [self._allocate() for _ in range(size)]
+        self._free = list(self._buffers)
+        self.allocated = size
+
+    def _allocate(self) -> PooledBuffer:
+        if not self._shared:
+            return PooledBuffer(self, np.empty(self._shape, dtype=np.uint8))
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self._shape)))
+        array = np.ndarray(self._shape, dtype=np.uint8, buffer=shm.buf)
+        return PooledBuffer(self, array, shm)
+
+    def acquire(self) -> PooledBuffer:
+        with self._lock:
+            if self._free:
+                buf = self._free.pop()
+            else:
+                buf = self._allocate()
+                self._buffers.append(buf)
+                self.allocated += 1
+            buf._refs = 1
+            buf.generation += 1
+            return buf
+
+    def close(self) -> None:
+        for buf in self._buffers:
+            if buf._shm is None:
+                continue
+            buf._shm_array = None
+            try:
+                buf._shm.close()
+            except BufferError:
+                # a consumer still holds a view, the mapping goes away with the process
+                pass
+            buf._shm.unlink()
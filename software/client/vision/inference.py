@@ -1,197 +1,795 @@
 import threading
 import time
-from typing import Optional, List, Tuple
+from functools import partial
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, List, Dict, Tuple, TYPE_CHECKING, cast
 import numpy as np
 from ultralytics import YOLO
+from ultralytics.engine.results import Results
 import cv2
 
 from .camera import CaptureThread
-from .types import VisionResult, CameraFrame
+from .types import VisionResult, CameraFrame, Detections, Region
+from .model_registry import ModelRegistry
+from .motion_gate import MotionGate
+from .inference_worker import InferenceWorkerError
+from logger import Logger
+
+if TYPE_CHECKING:
+    from .inference_worker import InferenceWorker
+
+FRAME_WAIT_TIMEOUT_S = 0.5
+# a worker process that died is started again this many times before its lane gives up
+WORKER_MAX_RESTARTS = 3
+STATS_WINDOW_SIZE = 60
+MODEL_STRIDE = 32
+# how often a binding with a roi still looks at the whole frame, so anything that
+# wandered outside it (or a bumped camera) is noticed
+ROI_FULL_FRAME_INTERVAL_S = 5.0
+
+
+def runModel(
+    model: YOLO, images: List[np.ndarray], imgsz: Optional[int] = None
+) -> List[Results]:
+    # plain detections, ultralytics' tracker can't persist across batched cameras and
+    # feeder pieces are tracked downstream by CentroidTracker. predict rejects
+    # imgsz=None, leave it out to get the model's own size
+    if imgsz is None:
+        results = model.predict(images, verbose=False)
+    else:
+        results = model.predict(images, verbose=False, imgsz=imgsz)
+    # without stream=True predict returns a list of Results
+    return cast(List[Results], results)
+
+
+def cropToRegion(image: np.ndarray, region: Optional[Region]) -> np.ndarray:
+    if region is None:
+        return image
+    x1, y1, x2, y2 = region
+    return image[y1:y2, x1:x2]
+
+
+def nativeImageSize(
+    regions: List[Optional[Region]], max_imgsz: Optional[int]
+) -> Optional[int]:
+    # run crops at their own pixel density instead of letting the model shrink them
+    sizes = [max(r[2] - r[0], r[3] - r[1]) for r in regions if r is not None]
+    if not sizes:
+        return None
+    imgsz = -(-max(sizes) // MODEL_STRIDE) * MODEL_STRIDE
+    if max_imgsz is not None:
+        imgsz = min(imgsz, max_imgsz)
+    return imgsz
+
+
+def _unletterboxMasks(masks: np.ndarray, orig_shape) -> np.ndarray:
+    # masks come back at the letterboxed input size, cut the padding off so they line
+    # up with the image the model was given
+    mh, mw = masks.shape[1:]
+    oh, ow = orig_shape[:2]
+    gain = min(mh / oh, mw / ow)
+    pad_w = (mw - ow * gain) / 2
+    pad_h = (mh - oh * gain) / 2
+    top, left = int(round(pad_h - 0.1)), int(round(pad_w - 0.1))
+    bottom, right = mh - int(round(pad_h + 0.1)), mw - int(round(pad_w + 0.1))
+    return masks[:, top:bottom, left:right]
+
+
+def detectionsFromResults(
+    result, names: Dict[int, str], region: Optional[Region] = None
+) -> Detections:
+    # region is where in the frame the image the model saw was cropped from
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return Detections(
+            class_ids=np.zeros(0, dtype=np.int32),
+            confidences=np.zeros(0, dtype=np.float32),
+            boxes=np.zeros((0, 4), dtype=np.float32),
+            masks=None,
+            names=names,
+            mask_region=region,
+        )
+    masks = None
+    if result.masks is not None:
+        masks = _unletterboxMasks(
+            result.masks.data.cpu().numpy() > 0, result.orig_shape
+        )
+    xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+    if region is not None:
+        xyxy += np.array([region[0], region[1], region[0], region[1]], dtype=np.float32)
+    return Detections(
+        class_ids=boxes.cls.cpu().numpy().astype(np.int32),
+        confidences=boxes.conf.cpu().numpy().astype(np.float32),
+        boxes=xyxy,
+        masks=masks,
+        names=names,
+        mask_region=region,
+    )
+
+
+def visionResultsFromDetections(
+    detections: Detections, timestamp: float
+) -> List[VisionResult]:
+    vision_results: List[VisionResult] = []
+    for i in range(len(detections)):
+        class_id = int(detections.class_ids[i])
+        x1, y1, x2, y2 = (int(v) for v in detections.boxes[i])
+        vision_results.append(
+            VisionResult(
+                class_id=class_id,
+                class_name=detections.names.get(class_id, str(class_id)),
+                confidence=float(detections.confidences[i]),
+                bbox=(x1, y1, x2, y2),
+                timestamp=timestamp,
+            )
+        )
+    return vision_results
+
+
+def drawDetections(
+    raw: np.ndarray, detections: Detections, exclude_classes: List[int]
+) -> np.ndarray:
+    annotated = raw.copy()
+    rx1, ry1, rx2, ry2 = detections.maskRegion(raw.shape)
+    for i in range(len(detections)):
+        class_id = int(detections.class_ids[i])
+        if class_id in exclude_classes:
+            continue
+        confidence = float(detections.confidences[i])
+        x1, y1, x2, y2 = (int(v) for v in detections.boxes[i])
+        class_name = detections.names.get(class_id, str(class_id))
+
+        # choose color based on class: carousel (2) = red, object (0) = green
+        color = (0, 0, 255) if class_id == 2 else (0, 255, 0)
+
+        # draw bounding box
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+        # draw label
+        label = f"{class_name} {confidence:.2f}"
+        cv2.putText(
+            annotated,
+            label,
+            (x1, y1 - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            color,
+            2,
+        )
+        # draw mask if available
+        if detections.masks is not None and i < len(detections.masks):
+            mask_pixels = detections.regionMask(i, raw.shape)
+            # tint mask pixels in place, same as addWeighted(1.0, 0.4) against a solid color
+            tint = np.round(np.array(color) * 0.4).astype(np.int16)
+            region = annotated[ry1:ry2, rx1:rx2]
+            region[mask_pixels] = np.clip(
+                region[mask_pixels].astype(np.int16) + tint, 0, 255
+            ).astype(np.uint8)
+    return annotated
+
+
+def buildSegmentationMap(detections: Detections, shape) -> Optional[np.ndarray]:
+    if detections.masks is None or len(detections.masks) == 0:
+        return None
+    # label each pixel at model resolution with the class of the last mask covering it,
+    # then one nearest-neighbour resize up to the region it covers
+    masks = detections.masks
+    last = len(masks) - 1 - np.argmax(masks[::-1], axis=0)
+    labels = np.where(
+        masks.any(axis=0), detections.class_ids.astype(np.uint8)[last], 0
+    ).astype(np.uint8)
+    x1, y1, x2, y2 = detections.maskRegion(shape)
+    if labels.shape != (y2 - y1, x2 - x1):
+        labels = cv2.resize(labels, (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST)
+    if detections.mask_region is None:
+        return labels
+    segmentation_map = np.zeros(shape[:2], dtype=np.uint8)
+    segmentation_map[y1:y2, x1:x2] = labels
+    return segmentation_map
+
+
+@dataclass
+class BindingStats:
+    fps: float
+    queue_delay_ms: float
+    inference_ms: float
+    skipped_stale: int
+    # frames the motion gate answered with the previous result instead of inferring
+    reused_static: int = 0
+    reuse_rate: float = 0.0
+    # inference time those frames would have cost, at the recent average
+    saved_inference_s: float = 0.0
 
 
 class CameraModelBinding:
     camera: CaptureThread
+    model_path: Optional[str]
     model: Optional[YOLO]
     latest_result: Optional[VisionResult]
     latest_annotated_frame: Optional[CameraFrame]
-    latest_raw_results: Optional[List]
-    last_processed_timestamp: float
+    last_processed_seq: int
     exclude_classes_from_plot: List[int]
+    on_demand: bool
+    priority: int
+    deadline_ms: Optional[float]
+    skipped_stale: int
+    pending_since: Optional[float]
+    roi: Optional[Region]
+    roi_max_imgsz: Optional[int]
+    motion_gate: Optional[MotionGate]
+    reused_static: int
+    saved_inference_s: float
+    _last_full_frame: float
+    _result_cond: threading.Condition
+    _timings: Deque[Tuple[float, float, float]]
 
     def __init__(
         self,
         camera: CaptureThread,
         model_path: Optional[str],
+        model: Optional[YOLO],
         exclude_classes_from_plot: Optional[List[int]] = None,
+        on_demand: bool = False,
+        priority: int = 0,
+        deadline_ms: Optional[float] = None,
+        roi_max_imgsz: Optional[int] = None,
+        motion_gate: Optional[MotionGate] = None,
     ):
         self.camera = camera
-        self.model = YOLO(model_path) if model_path else None
+        self.model_path = model_path
+        # shared with every binding using the same weights, set by the lane once the
+        # registry has it warm. stays None when a worker process runs it
+        self.model = model
         self.latest_result = None
+        # the binding holds one retain on this frame until the next result replaces
+        # it. fine for its seq, timestamp and detections, but whoever reads its pixels
+        # must hold their own retain, see retainLatestResult
         self.latest_annotated_frame = None
-        self.latest_raw_results = None
-        self.last_processed_timestamp = 0.0
+        self.last_processed_seq = 0
         self.exclude_classes_from_plot = exclude_classes_from_plot or []
+        # on-demand bindings only infer while their camera is triggered
+        self.on_demand = on_demand
+        # frames are scheduled earliest deadline first, lower priority value wins ties.
+        # a frame still waiting past its deadline is skipped, a fresher one will follow
+        self.priority = priority
+        self.deadline_ms = deadline_ms
+        self.skipped_stale = 0
+        # when this binding started waiting for a turn, bounds how long a
+        # higher priority binding can starve it
+        self.pending_since = None
+        # only this part of the frame is inferred, see setRoi
+        self.roi = None
+        self.roi_max_imgsz = roi_max_imgsz
+        # skips inference while nothing inside the roi moves, see reuseIfStatic
+        self.motion_gate = motion_gate
+        self.reused_static = 0
+        self.saved_inference_s = 0.0
+        self._last_full_frame = 0.0
+        self._result_cond = threading.Condition()
+        # (finished_at, queue_delay_ms, inference_ms) for recent results
+        self._timings = deque(maxlen=STATS_WINDOW_SIZE)
 
+    def deadlineFor(self, frame: CameraFrame) -> float:
+        if self.deadline_ms is None:
+            return float("inf")
+        return frame.timestamp + self.deadline_ms / 1000.0
 
-class InferenceThread:
+    def scheduleDeadline(self, now: float) -> float:
+        # fresh frames keep arriving, so measure from when the binding began waiting
+        # rather than from the frame, otherwise a busy feeder would never yield
+        if self.deadline_ms is None:
+            return float("inf")
+        if self.pending_since is None:
+            self.pending_since = now
+        return self.pending_since + self.deadline_ms / 1000.0
+
+    def setRoi(self, roi: Optional[Region]) -> None:
+        self.roi = roi
+
+    def regionFor(self, frame: CameraFrame, now: float) -> Optional[Region]:
+        if self.roi is None or now - self._last_full_frame >= ROI_FULL_FRAME_INTERVAL_S:
+            self._last_full_frame = now
+            return None
+        return self.clippedRoi(frame)
+
+    def clippedRoi(self, frame: CameraFrame) -> Optional[Region]:
+        roi = self.roi
+        if roi is None:
+            return None
+        h, w = frame.raw.shape[:2]
+        x1, y1 = max(0, roi[0]), max(0, roi[1])
+        x2, y2 = min(w, roi[2]), min(h, roi[3])
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return (x1, y1, x2, y2)
+
+    def recordTiming(self, queue_delay_ms: float, inference_ms: float) -> None:
+        self._timings.append((time.time(), queue_delay_ms, inference_ms))
+
+    def meanInferenceMs(self) -> float:
+        timings = list(self._timings)
+        return sum(t[2] for t in timings) / max(len(timings), 1)
+
+    def getStats(self) -> BindingStats:
+        timings = list(self._timings)
+        fps = 0.0
+        if len(timings) > 1:
+            span = timings[-1][0] - timings[0][0]
+            fps = (len(timings) - 1) / span if span > 0 else 0.0
+        count = max(len(timings), 1)
+        return BindingStats(
+            fps=fps,
+            queue_delay_ms=sum(t[1] for t in timings) / count,
+            inference_ms=sum(t[2] for t in timings) / count,
+            skipped_stale=self.skipped_stale,
+            reused_static=self.reused_static,
+            reuse_rate=self.motion_gate.hit_rate if self.motion_gate else 0.0,
+            saved_inference_s=self.saved_inference_s,
+        )
+
+    def reuseIfStatic(self, frame: CameraFrame) -> Optional[Tuple[Detections, float]]:
+        # the previous detections and when their frame was captured, when nothing moved
+        # since and they aren't older than the gate's staleness bound. None means infer
+        previous = self.latest_annotated_frame
+        if self.motion_gate is None or previous is None or previous.detections is None:
+            return None
+        if not self.motion_gate.isStatic(
+            frame.raw, self.clippedRoi(frame), frame.timestamp
+        ):
+            return None
+        self.reused_static += 1
+        self.saved_inference_s += self.meanInferenceMs() / 1000.0
+        return previous.detections, previous.detected_at
+
+    @property
+    def latest_detections(self) -> Optional[Detections]:
+        frame = self.latest_annotated_frame
+        return frame.detections if frame is not None else None
+
+    def publishResult(self, frame: CameraFrame, result: Optional[VisionResult]) -> None:
+        # hold the frame's pooled buffer until the next result replaces it
+        frame.retain()
+        with self._result_cond:
+            previous = self.latest_annotated_frame
+            self.latest_result = result
+            self.latest_annotated_frame = frame
+            self._result_cond.notify_all()
+        if previous is not None:
+            previous.release()
+
+    def retainLatestResult(self) -> Optional[CameraFrame]:
+        # latest inferred frame with its buffer already retained, so the next publish
+        # can't hand it back to the pool while the caller reads it. caller must release()
+        with self._result_cond:
+            frame = self.latest_annotated_frame
+            if frame is not None:
+                frame.retain()
+            return frame
+
+    def waitForResult(
+        self, after_seq: int, timeout: Optional[float] = None
+    ) -> Optional[CameraFrame]:
+        # blocks until a frame newer than after_seq has been inferred, None on timeout.
+        # the frame comes retained like retainLatestResult, caller must release()
+        def hasResult() -> bool:
+            frame = self.latest_annotated_frame
+            return frame is not None and frame.seq > after_seq
+
+        with self._result_cond:
+            if not self._result_cond.wait_for(hasResult, timeout):
+                return None
+            frame = self.latest_annotated_frame
+            # hasResult held, and results are only ever replaced, never cleared
+            assert frame is not None
+            frame.retain()
+            return frame
+
+
+class InferenceLane:
+    # one scheduling thread serving a set of binding groups, with its own worker
+    # process when inference runs out of process
+    name: str
+    _groups: List[List[CameraModelBinding]]
+    _out_of_process: bool
+    _registry: ModelRegistry
+    _logger: Optional[Logger]
+    error: Optional[str]
+    _worker_restarts: int
     _thread: Optional[threading.Thread]
     _stop_event: threading.Event
-    _bindings: List[CameraModelBinding]
+    _ready: threading.Event
+    _frame_event: threading.Event
+    _worker: Optional["InferenceWorker"]
 
-    def __init__(self):
+    def __init__(
+        self,
+        name: str,
+        groups: List[List[CameraModelBinding]],
+        out_of_process: bool,
+        registry: ModelRegistry,
+        logger: Optional[Logger] = None,
+    ):
+        self.name = name
+        self._groups = groups
+        self._out_of_process = out_of_process
+        self._registry = registry
+        self._logger = logger
+        # why the lane stopped inferring for good, None while it works
+        self.error = None
+        self._worker_restarts = 0
         self._thread = None
         self._stop_event = threading.Event()
-        self._bindings = []
-
-    def addBinding(
-        self,
-        camera: CaptureThread,
-        model_path: Optional[str],
-        exclude_classes_from_plot: Optional[List[int]] = None,
-    ) -> CameraModelBinding:
-        binding = CameraModelBinding(camera, model_path, exclude_classes_from_plot)
-        self._bindings.append(binding)
-        return binding
+        # set once every model of the lane is loaded and warmed up
+        self._ready = threading.Event()
+        self._frame_event = threading.Event()
+        self._worker = None
+        for group in groups:
+            for binding in group:
+                binding.camera.addFrameListener(self._frame_event)
 
     def start(self) -> None:
+        if self._out_of_process:
+            from .inference_worker import InferenceWorker
+
+            model_paths: Dict[str, str] = {}
+            for group in self._groups:
+                for binding in group:
+                    assert binding.model_path is not None
+                    model_paths[binding.camera.name] = binding.model_path
+            # started from the lane thread, spawning it can take a while
+            self._worker = InferenceWorker(model_paths, self._registry.backend)
         self._stop_event.clear()
-        self._thread = threading.Thread(target=self._inferenceLoop, daemon=True)
+        self._thread = threading.Thread(
+            target=self._inferenceLoop, name=f"inference_{self.name}", daemon=True
+        )
         self._thread.start()
 
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
     def stop(self) -> None:
         self._stop_event.set()
+        self._frame_event.set()
         if self._thread:
             self._thread.join(timeout=5.0)
+        if self._worker:
+            self._worker.stop()
+            self._worker = None
 
-    def _inferenceLoop(self) -> None:
-        while not self._stop_event.is_set():
-            processed_any = False
+    def _collectPending(
+        self, group: List[CameraModelBinding], now: float
+    ) -> List[Tuple[CameraModelBinding, CameraFrame]]:
+        pending: List[Tuple[CameraModelBinding, CameraFrame]] = []
+        for binding in group:
+            if binding.on_demand and not binding.camera.triggered:
+                continue
+            frame = binding.camera.retainLatestFrame()
+            if frame is None:
+                continue
+            if frame.seq <= binding.last_processed_seq:
+                frame.release()
+                continue
+            if now > binding.deadlineFor(frame):
+                # already too late to be useful, wait for the next frame instead
+                binding.last_processed_seq = frame.seq
+                binding.skipped_stale += 1
+                frame.release()
+                continue
+            pending.append((binding, frame))
+        return pending
 
-            for binding in self._bindings:
-                if binding.model is None:
-                    continue
+    def _nextBatch(self) -> Optional[List[Tuple[CameraModelBinding, CameraFrame]]]:
+        now = time.time()
+        best = None
+        best_key = None
+        for group in self._groups:
+            pending = self._collectPending(group, now)
+            if not pending:
+                continue
+            key = (
+                min(binding.scheduleDeadline(now) for binding, _ in pending),
+                min(binding.priority for binding, _ in pending),
+            )
+            if best_key is None or key < best_key:
+                if best is not None:
+                    for _, frame in best:
+                        frame.release()
+                best, best_key = pending, key
+            else:
+                for _, frame in pending:
+                    frame.release()
+        return best
 
-                frame = binding.camera.latest_frame
-                if frame is None:
+    def _awaitModels(self) -> bool:
+        # the registry may still be loading, block this lane rather than the caller.
+        # False when a model or the worker never came up
+        if self._worker is not None:
+            try:
+                self._worker.start()
+            except InferenceWorkerError as e:
+                self._fail(str(e))
+                return False
+        else:
+            for group in self._groups:
+                model_path = group[0].model_path
+                if model_path is None:
+                    # preview-only bindings, nothing to load
                     continue
+                try:
+                    model = self._registry.get(model_path)
+                except RuntimeError as e:
+                    cause = f": {e.__cause__}" if e.__cause__ is not None else ""
+                    self._fail(f"{e}{cause}")
+                    return False
+                for binding in group:
+                    binding.model = model
+        self._ready.set()
+        return True
 
-                if frame.timestamp <= binding.last_processed_timestamp:
-                    continue
+    def _inferenceLoop(self) -> None:
+        if not self._awaitModels():
+            return
+        while not self._stop_event.is_set():
+            self._frame_event.clear()
+            pending = self._nextBatch()
+            if pending is None:
+                # sleep until any bound camera publishes a frame
+                self._frame_event.wait(timeout=FRAME_WAIT_TIMEOUT_S)
+                continue
 
-                processed_any = True
-                binding.last_processed_timestamp = frame.timestamp
-
-                results = binding.model.track(frame.raw, verbose=False, persist=False)
-
-                vision_results: List[VisionResult] = []
-                annotated = frame.raw.copy()
-                segmentation_map = None
-
-                if len(results) > 0 and len(results[0].boxes) > 0:
-                    for box in results[0].boxes:
-                        class_id = int(box.cls[0])
-                        confidence = float(box.conf[0])
-                        xyxy = list(map(int, box.xyxy[0].tolist()))
-                        bbox: Tuple[int, int, int, int] = (
-                            xyxy[0],
-                            xyxy[1],
-                            xyxy[2],
-                            xyxy[3],
-                        )
-                        class_name = binding.model.names.get(class_id, str(class_id))
-                        vision_results.append(
-                            VisionResult(
-                                class_id=class_id,
-                                class_name=class_name,
-                                confidence=confidence,
-                                bbox=bbox,
-                                timestamp=frame.timestamp,
-                            )
-                        )
-
-                    if binding.exclude_classes_from_plot:
-                        annotated = results[0].plot(
-                            labels=False, boxes=False, masks=False, probs=False
-                        )
-                        # manually draw only non-excluded classes
-                        for i, box in enumerate(results[0].boxes):
-                            class_id = int(box.cls[0])
-                            if class_id in binding.exclude_classes_from_plot:
-                                continue
-                            confidence = float(box.conf[0])
-                            xyxy = list(map(int, box.xyxy[0].tolist()))
-                            class_name = binding.model.names.get(
-                                class_id, str(class_id)
-                            )
-
-                            # choose color based on class: carousel (2) = red, object (0) = green
-                            color = (0, 0, 255) if class_id == 2 else (0, 255, 0)
-
-                            # draw bounding box
-                            cv2.rectangle(
-                                annotated,
-                                (xyxy[0], xyxy[1]),
-                                (xyxy[2], xyxy[3]),
-                                color,
-                                2,
-                            )
-                            # draw label
-                            label = f"{class_name} {confidence:.2f}"
-                            cv2.putText(
-                                annotated,
-                                label,
-                                (xyxy[0], xyxy[1] - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX,
-                                0.5,
-                                color,
-                                2,
-                            )
-                            # draw mask if available
-                            if results[0].masks is not None and i < len(
-                                results[0].masks
-                            ):
-                                mask_data = results[0].masks[i].data[0].cpu().numpy()
-                                mh, mw = mask_data.shape
-                                h, w = frame.raw.shape[:2]
-                                if mh != h or mw != w:
-                                    mask_data = cv2.resize(
-                                        mask_data,
-                                        (w, h),
-                                        interpolation=cv2.INTER_NEAREST,
-                                    )
-                                mask_data = (mask_data > 0).astype(np.uint8)
-                                color_mask = np.zeros_like(annotated)
-                                color_mask[mask_data == 1] = color
-                                annotated = cv2.addWeighted(
-                                    annotated, 1.0, color_mask, 0.4, 0
-                                )
+            for binding, frame in pending:
+                binding.last_processed_seq = frame.seq
+                binding.pending_since = None
+            try:
+                to_infer = []
+                for binding, frame in pending:
+                    reused = binding.reuseIfStatic(frame)
+                    if reused is None:
+                        to_infer.append((binding, frame))
                     else:
-                        annotated = results[0].plot()
-
-                    if results[0].masks is not None:
-                        h, w = frame.raw.shape[:2]
-                        segmentation_map = np.zeros((h, w), dtype=np.int32)
-                        for i, mask in enumerate(results[0].masks):
-                            cls = int(results[0].boxes[i].cls[0])
-                            mask_data = mask.data[0].cpu().numpy()
-                            mh, mw = mask_data.shape
-                            if mh != h or mw != w:
-                                mask_data = cv2.resize(
-                                    mask_data.astype(np.uint8),
-                                    (w, h),
-                                    interpolation=cv2.INTER_NEAREST,
-                                )
-                            segmentation_map[mask_data > 0] = cls
-
-                binding.latest_result = vision_results[0] if vision_results else None
-                binding.latest_raw_results = results
-                binding.latest_annotated_frame = CameraFrame(
-                    raw=frame.raw,
-                    annotated=annotated,
-                    results=vision_results,
-                    timestamp=frame.timestamp,
-                    segmentation_map=segmentation_map,
+                        detections, detected_at = reused
+                        self._publish(binding, frame, None, detections, detected_at)
+                if to_infer:
+                    self._processBatch(to_infer)
+            except InferenceWorkerError as e:
+                if not self._restartWorker(e):
+                    break
+            finally:
+                for _, frame in pending:
+                    frame.release()
+
+    def _restartWorker(self, error: InferenceWorkerError) -> bool:
+        # False once the lane has given up on its worker
+        assert self._worker is not None
+        self._worker.stop()
+        self._worker_restarts += 1
+        if self._worker_restarts > WORKER_MAX_RESTARTS:
+            self._fail(f"worker died {self._worker_restarts} times, last: {error}")
+            return False
+        self._log(
+            f"inference lane {self.name}: {error}, restarting "
+            f"({self._worker_restarts}/{WORKER_MAX_RESTARTS})"
+        )
+        try:
+            self._worker.start()
+        except InferenceWorkerError as e:
+            self._fail(f"worker failed to restart: {e}")
+            return False
+        return True
+
+    def _fail(self, error: str) -> None:
+        self.error = error
+        self._ready.clear()
+        self._log(f"inference lane {self.name} stopped: {error}")
+
+    def _log(self, msg: str) -> None:
+        if self._logger is not None:
+            self._logger.error(msg)
+        else:
+            print(msg)
+
+    def _runBatch(
+        self, pending: List[Tuple[CameraModelBinding, CameraFrame]]
+    ) -> Tuple[List[Optional[List]], List[Detections]]:
+        now = time.time()
+        regions = [binding.regionFor(frame, now) for binding, frame in pending]
+        imgsz = nativeImageSize(
+            regions, max((b.roi_max_imgsz or 0) for b, _ in pending) or None
+        )
+        if self._worker is not None:
+            detections = self._worker.infer(
+                [
+                    (binding.camera.name, frame, region)
+                    for (binding, frame), region in zip(pending, regions)
+                ],
+                imgsz,
+            )
+            return [None] * len(pending), detections
+
+        model = pending[0][0].model
+        assert model is not None
+        results = runModel(
+            model,
+            [
+                cropToRegion(frame.raw, region)
+                for (_, frame), region in zip(pending, regions)
+            ],
+            imgsz,
+        )
+        return (
+            [[result] for result in results],
+            [
+                detectionsFromResults(result, model.names, region)
+                for result, region in zip(results, regions)
+            ],
+        )
+
+    def _annotate(
+        self,
+        binding: CameraModelBinding,
+        frame: CameraFrame,
+        raw_results: Optional[List],
+        detections: Detections,
+    ) -> np.ndarray:
+        # raw is shared and read-only, only copy it once something gets drawn on it
+        if len(detections) == 0:
+            return frame.raw
+        # ultralytics can only plot onto the image it saw, which may have been a crop
+        if (
+            binding.exclude_classes_from_plot
+            or raw_results is None
+            or detections.mask_region is not None
+        ):
+            return drawDetections(
+                frame.raw, detections, binding.exclude_classes_from_plot
+            )
+        return raw_results[0].plot()
+
+    def _processBatch(
+        self, pending: List[Tuple[CameraModelBinding, CameraFrame]]
+    ) -> None:
+        started_at = time.time()
+        raw_results, detections = self._runBatch(pending)
+        inference_ms = (time.time() - started_at) * 1000
+        for (binding, frame), frame_results, frame_detections in zip(
+            pending, raw_results, detections
+        ):
+            binding.recordTiming((started_at - frame.timestamp) * 1000, inference_ms)
+            self._publish(
+                binding, frame, frame_results, frame_detections, frame.timestamp
+            )
+
+    def _publish(
+        self,
+        binding: CameraModelBinding,
+        frame: CameraFrame,
+        raw_results: Optional[List],
+        detections: Detections,
+        detected_at: float,
+    ) -> None:
+        vision_results = visionResultsFromDetections(detections, detected_at)
+        binding.publishResult(
+            CameraFrame(
+                raw=frame.raw,
+                annotated=None,
+                render_annotated=partial(
+                    self._annotate, binding, frame, raw_results, detections
+                ),
+                results=vision_results,
+                timestamp=frame.timestamp,
+                render_segmentation_map=partial(
+                    buildSegmentationMap, detections, frame.raw.shape
+                ),
+                seq=frame.seq,
+                buffer=frame.buffer,
+                detections=detections,
+                detected_at=detected_at,
+            ),
+            vision_results[0] if vision_results else None,
+        )
+
+
+class InferenceThread:
+    _bindings: List[CameraModelBinding]
+    _groups: Dict[str, List[CameraModelBinding]]
+    _lanes: List[InferenceLane]
+    _out_of_process: bool
+    _lane_per_model: bool
+    _registry: ModelRegistry
+    _logger: Optional[Logger]
+
+    def __init__(
+        self,
+        out_of_process: bool = False,
+        lane_per_model: bool = False,
+        registry: Optional[ModelRegistry] = None,
+        logger: Optional[Logger] = None,
+    ):
+        self._bindings = []
+        # bindings sharing weights share one model and are inferred as one batch
+        self._groups = {}
+        self._lanes = []
+        self._out_of_process = out_of_process
+        # one scheduling thread (and worker process) per model instead of one for all
+        self._lane_per_model = lane_per_model
+        self._registry = registry or ModelRegistry(in_process=not out_of_process)
+        self._logger = logger
+
+    def addBinding(
+        self,
+        camera: CaptureThread,
+        model_path: Optional[str],
+        exclude_classes_from_plot: Optional[List[int]] = None,
+        on_demand: bool = False,
+        priority: int = 0,
+        deadline_ms: Optional[float] = None,
+        roi_max_imgsz: Optional[int] = None,
+        motion_gate: Optional[MotionGate] = None,
+    ) -> CameraModelBinding:
+        binding = CameraModelBinding(
+            camera,
+            model_path,
+            None,
+            exclude_classes_from_plot,
+            on_demand=on_demand,
+            priority=priority,
+            deadline_ms=deadline_ms,
+            roi_max_imgsz=roi_max_imgsz,
+            motion_gate=motion_gate,
+        )
+        if model_path is not None:
+            self._groups.setdefault(model_path, []).append(binding)
+            self._registry.preload([model_path])
+        self._bindings.append(binding)
+        return binding
+
+    def getStats(self) -> Dict[str, BindingStats]:
+        return {
+            binding.camera.name: binding.getStats()
+            for binding in self._bindings
+            if binding.model_path is not None
+        }
+
+    def start(self) -> None:
+        groups = list(self._groups.values())
+        if self._lane_per_model:
+            self._lanes = [
+                InferenceLane(
+                    group[0].camera.name,
+                    [group],
+                    self._out_of_process,
+                    self._registry,
+                    self._logger,
+                )
+                for group in groups
+            ]
+        else:
+            self._lanes = [
+                InferenceLane(
+                    "shared",
+                    groups,
+                    self._out_of_process,
+                    self._registry,
+                    self._logger,
                 )
+            ]
+        for lane in self._lanes:
+            lane.start()
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self._lanes) and all(lane.is_ready for lane in self._lanes)
 
-            if not processed_any:
-                time.sleep(0.01)
+    @property
+    def error(self) -> Optional[str]:
+        # first lane that stopped inferring for good
+        for lane in self._lanes:
+            if lane.error is not None:
+                return f"{lane.name}: {lane.error}"
+        return None
+
+    def stop(self) -> None:
+        for lane in self._lanes:
+            lane.stop()
+        self._lanes = []
@@ -0,0 +1,194 @@
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from .types import CameraFrame, Detections, Region
+from .backends import ModelBackend
+
+WORKER_START_TIMEOUT_S = 120.0
+WORKER_STOP_TIMEOUT_S = 5.0
+
+
+class InferenceWorkerError(Exception):
+    # the worker process died, or never came up
+    pass
+
+
+def packDetections(detections: Detections) -> Dict[str, Any]:
+    # masks dominate the message size, bit-pack them along the row axis for the pipe
+    packed: Dict[str, Any] = {
+        "class_ids": detections.class_ids,
+        "confidences": detections.confidences,
+        "boxes": detections.boxes,
+        "names": detections.names,
+        "masks": None,
+        "mask_width": 0,
+        "mask_region": detections.mask_region,
+    }
+    if detections.masks is not None:
+        packed["masks"] = np.packbits(detections.masks, axis=-1)
+        packed["mask_width"] = detections.masks.shape[-1]
+    return packed
+
+
+def unpackDetections(packed: Dict[str, Any]) -> Detections:
+    masks = None
+    if packed["masks"] is not None:
+        masks = np.unpackbits(
+            packed["masks"], axis=-1, count=packed["mask_width"]
+        ).astype(bool)
+    return Detections(
+        class_ids=packed["class_ids"],
+        confidences=packed["confidences"],
+        boxes=packed["boxes"],
+        masks=masks,
+        names=packed["names"],
+        mask_region=packed["mask_region"],
+    )
+
+
+def attachSharedMemory(name: str) -> shared_memory.SharedMemory:
+    # the capture process owns the segment, don't let this process' tracker unlink it
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # before 3.13 attaching registers it again, but a spawned worker shares the
+    # parent's resource tracker, which already has it. unregistering here would drop
+    # the capture process' own registration
+    return shared_memory.SharedMemory(name=name)
+
+
+def _workerMain(
+    conn: Connection, model_paths: Dict[str, str], backend: ModelBackend
+) -> None:
+    from ultralytics import YOLO
+    from .inference import cropToRegion, detectionsFromResults, runModel
+    from .model_registry import warmUpModel
+
+    models_by_path: Dict[str, YOLO] = {}
+    for path in set(model_paths.values()):
+        models_by_path[path] = backend.load(path)
+        warmUpModel(models_by_path[path])
+    models = {key: models_by_path[path] for key, path in model_paths.items()}
+    conn.send("ready")
+
+    attached: Dict[str, shared_memory.SharedMemory] = {}
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        # one request is a batch of frames for bindings that share a model
+        items, imgsz = request
+        images = []
+        for key, shared_name, shape, pixels, region in items:
+            if shared_name is None:
+                # sent already cropped
+                images.append(pixels)
+                continue
+            if shared_name not in attached:
+                attached[shared_name] = attachSharedMemory(shared_name)
+            images.append(
+                cropToRegion(
+                    np.ndarray(shape, dtype=np.uint8, buffer=attached[shared_name].buf),
+                    region,
+                )
+            )
+
+        model = models[items[0][0]]
+        results = runModel(model, images, imgsz)
+        conn.send(
+            [
+                packDetections(detectionsFromResults(r, model.names, item[4]))
+                for r, item in zip(results, items)
+            ]
+        )
+        del images, results
+
+    for shm in attached.values():
+        shm.close()
+
+
+class InferenceWorker:
+    # runs the models in a child process so inference CPU doesn't contend for the GIL
+    # with the control loop. frames are read straight out of the capture pool's shared
+    # memory, only the compact detections come back over the pipe.
+    _model_paths: Dict[str, str]
+    _backend: ModelBackend
+    _process: Optional[BaseProcess]
+    _conn: Optional[Connection]
+
+    def __init__(self, model_paths: Dict[str, str], backend: ModelBackend):
+        self._model_paths = model_paths
+        self._backend = backend
+        self._process = None
+        self._conn = None
+
+    def start(self) -> None:
+        # spawn, the parent already runs capture threads which fork would not survive cleanly
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_workerMain,
+            args=(child_conn, self._model_paths, self._backend),
+            name="inference_worker",
+            daemon=True,
+        )
+        process.start()
+        self._process = process
+        child_conn.close()
+        self._conn = parent_conn
+        if not parent_conn.poll(WORKER_START_TIMEOUT_S):
+            raise InferenceWorkerError("inference worker did not become ready")
+        try:
+            parent_conn.recv()
+        except EOFError:
+            raise InferenceWorkerError("inference worker exited while starting")
+
+    def infer(
+        self,
+        batch: List[Tuple[str, CameraFrame, Optional[Region]]],
+        imgsz: Optional[int] = None,
+    ) -> List[Detections]:
+        if self._conn is None:
+            raise InferenceWorkerError("inference worker is not running")
+        items = []
+        for key, frame, region in batch:
+            buf = frame.buffer
+            shared_name = buf.shared_name if buf is not None else None
+            if shared_name is not None:
+                items.append((key, shared_name, frame.raw.shape, None, region))
+            else:
+                pixels = frame.raw
+                if region is not None:
+                    pixels = pixels[region[1] : region[3], region[0] : region[2]]
+                items.append((key, None, None, np.ascontiguousarray(pixels), region))
+
+        # slots must not be recycled by the capture thread while the worker reads them
+        for _, frame, _ in batch:
+            frame.retain()
+        try:
+            self._conn.send((items, imgsz))
+            packed = self._conn.recv()
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            raise InferenceWorkerError("inference worker exited")
+        finally:
+            for _, frame, _ in batch:
+                frame.release()
+        return [unpackDetections(p) for p in packed]
+
+    def stop(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            self._process.join(timeout=WORKER_STOP_TIMEOUT_S)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
@@ -0,0 +1,98 @@
+import threading
+from typing import Dict, Iterable, Optional
+import numpy as np
+from ultralytics import YOLO
+
+from global_config import GlobalConfig
+from .backends import ModelBackend, BACKEND_TORCH
+
+WARMUP_RUNS = 3
+WARMUP_BATCH_SIZE = 2
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+
+
+def warmUpModel(model: YOLO, runs: int = WARMUP_RUNS) -> None:
+    # the first calls pay for lazy init (fusing, allocator growth), run them on blank
+    # frames so the first real frame doesn't
+    from .inference import runModel
+
+    frame = np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+    for _ in range(runs):
+        runModel(model, [frame])
+    # bindings sharing a model are inferred as a batch
+    runModel(model, [frame] * WARMUP_BATCH_SIZE)
+
+
+class ModelRegistry:
+    # loads each distinct weights file once, in the background, so startup can overlap
+    # with homing the hardware. when a worker process runs the models this only makes
+    # sure the backend's export is cached, the worker loads and warms its own copy
+    backend: ModelBackend
+    in_process: bool
+    _models: Dict[str, YOLO]
+    _errors: Dict[str, BaseException]
+    _loaded: Dict[str, threading.Event]
+    _lock: threading.Lock
+
+    def __init__(self, backend: Optional[ModelBackend] = None, in_process: bool = True):
+        self.backend = backend or ModelBackend()
+        self.in_process = in_process
+        self._models = {}
+        self._errors = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def preload(self, model_paths: Iterable[str]) -> None:
+        for model_path in model_paths:
+            with self._lock:
+                if model_path in self._loaded:
+                    continue
+                self._loaded[model_path] = threading.Event()
+            threading.Thread(
+                target=self._load,
+                args=(model_path,),
+                name=f"model_load_{model_path}",
+                daemon=True,
+            ).start()
+
+    def _load(self, model_path: str) -> None:
+        try:
+            if not self.in_process:
+                if self.backend.name != BACKEND_TORCH:
+                    self.backend.export(model_path)
+                return
+            model = self.backend.load(model_path)
+            warmUpModel(model)
+            self._models[model_path] = model
+        except BaseException as e:
+            self._errors[model_path] = e
+        finally:
+            self._loaded[model_path].set()
+
+    def get(self, model_path: str) -> YOLO:
+        # blocks until the model is loaded and warm, starting the load if nobody asked yet
+        if not self.in_process:
+            raise RuntimeError("models are loaded by the inference worker")
+        self.preload([model_path])
+        self._loaded[model_path].wait()
+        if model_path in self._errors:
+            raise RuntimeError(f"failed to load model {model_path}") from self._errors[
+                model_path
+            ]
+        return self._models[model_path]
+
+
+def mkModelRegistry(gc: GlobalConfig) -> ModelRegistry:
+    registry = ModelRegistry(
+        ModelBackend(gc.inference_backend, gc.inference_int8, gc.inference_int8_data),
+        in_process=not gc.inference_in_subprocess,
+    )
+    registry.preload(
+        path
+        for path in (
+            gc.feeder_vision_model_path,
+            gc.classification_chamber_vision_model_path,
+        )
+        if path
+    )
+    return registry
@@ -0,0 +1,66 @@
+from typing import Optional
+import cv2
+import numpy as np
+
+from .types import Region
+
+MOTION_GATE_WIDTH = 160
+# a thumbnail pixel has changed once its gray level moves by more than this
+MOTION_PIXEL_THRESHOLD = 12
+# and the scene has moved once more than this fraction of thumbnail pixels changed
+MOTION_CHANGED_FRACTION = 0.002
+# a result is never reused for longer than this, so a piece sliding in slowly is
+# still picked up
+MOTION_GATE_MAX_STALENESS_MS = 500
+
+
+class MotionGate:
+    # decides whether a frame is worth inferring by diffing a small grayscale thumbnail
+    # of the region against the last frame that was inferred. comparing to the last
+    # inferred frame rather than the previous one means slow drift still adds up
+    max_staleness_ms: float
+    checks: int
+    hits: int
+    _reference: Optional[np.ndarray]
+    _reference_region: Optional[Region]
+    _reference_timestamp: float
+
+    def __init__(self, max_staleness_ms: float = MOTION_GATE_MAX_STALENESS_MS):
+        self.max_staleness_ms = max_staleness_ms
+        self.checks = 0
+        self.hits = 0
+        self._reference = None
+        self._reference_region = None
+        self._reference_timestamp = 0.0
+
+    def _thumbnail(self, image: np.ndarray, region: Optional[Region]) -> np.ndarray:
+        if region is not None:
+            image = image[region[1] : region[3], region[0] : region[2]]
+        h, w = image.shape[:2]
+        size = (MOTION_GATE_WIDTH, max(1, round(h * MOTION_GATE_WIDTH / w)))
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def isStatic(
+        self, image: np.ndarray, region: Optional[Region], timestamp: float
+    ) -> bool:
+        # a frame that isn't static becomes the new reference, the caller infers it
+        self.checks += 1
+        thumbnail = self._thumbnail(image, region)
+        if (
+            self._reference is not None
+            and region == self._reference_region
+            and (timestamp - self._reference_timestamp) * 1000 <= self.max_staleness_ms
+        ):
+            changed = cv2.absdiff(thumbnail, self._reference) > MOTION_PIXEL_THRESHOLD
+            if np.count_nonzero(changed) <= MOTION_CHANGED_FRACTION * changed.size:
+                self.hits += 1
+                return True
+        self._reference = thumbnail
+        self._reference_region = region
+        self._reference_timestamp = timestamp
+        return False
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.checks if self.checks else 0.0
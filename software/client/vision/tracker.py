@@ -0,0 +1,183 @@
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+import numpy as np
+
+from .types import DetectedMask
+from .utils import maskCenterOfMass
+
+# a detection continues a track when its box overlaps the track's predicted box this
+# much, or failing that when its centroid lands this close to the predicted position
+TRACK_MATCH_IOU = 0.2
+TRACK_MATCH_DISTANCE_PX = 60.0
+# frames a track is kept at its predicted position without a matching detection, so a
+# single missed detection doesn't read as an empty channel
+TRACK_MAX_MISSED_FRAMES = 2
+# frames a piece must be detected in before its track is reported, so a single
+# spurious detection never reads as a piece
+TRACK_MIN_HITS = 2
+# weight of the newest frame's motion in the velocity estimate
+TRACK_VELOCITY_SMOOTHING = 0.5
+
+
+@dataclass
+class Track:
+    track_id: int
+    # latest matched detection, its instance_id is the track id
+    detection: DetectedMask
+    position: Tuple[float, float]
+    velocity: Tuple[float, float]  # frame px per second
+    box: Tuple[float, float, float, float]
+    timestamp: float
+    hits: int = 1
+    missed: int = 0
+
+    @property
+    def confidence(self) -> float:
+        return self.detection.confidence
+
+    def predict(self, timestamp: float) -> Tuple[float, float]:
+        dt = timestamp - self.timestamp
+        return (
+            self.position[0] + self.velocity[0] * dt,
+            self.position[1] + self.velocity[1] * dt,
+        )
+
+
+def _boxIou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # (N, 4) x (M, 4) xyxy -> (N, M)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def _boxTuple(box: np.ndarray) -> Tuple[float, float, float, float]:
+    return (float(box[0]), float(box[1]), float(box[2]), float(box[3]))
+
+
+def _greedyMatch(
+    score: np.ndarray, valid: np.ndarray, higher_is_better: bool
+) -> List[Tuple[int, int]]:
+    # best pairs first, each row and column used at most once
+    rows, cols = np.nonzero(valid)
+    order = np.argsort(score[rows, cols])
+    if higher_is_better:
+        order = order[::-1]
+    used_rows = set()
+    used_cols = set()
+    pairs = []
+    for r, c in zip(rows[order], cols[order]):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((int(r), int(c)))
+    return pairs
+
+
+class CentroidTracker:
+    # keeps ids, positions and velocities of feeder pieces across frames. tracks are
+    # predicted forward at constant velocity, then matched to detections by box iou,
+    # falling back to centroid distance for small or fast pieces. update() only
+    # returns tracks confirmed over TRACK_MIN_HITS frames
+    _tracks: List[Track]
+    _next_id: int
+
+    def __init__(self):
+        self._tracks = []
+        self._next_id = 1
+
+    def update(self, detections: List[DetectedMask], timestamp: float) -> List[Track]:
+        centers: List[Optional[Tuple[float, float]]] = [
+            maskCenterOfMass(d.mask) for d in detections
+        ]
+        detections = [d for d, c in zip(detections, centers) if c is not None]
+        det_centers = np.array([c for c in centers if c is not None]).reshape(-1, 2)
+        det_boxes = np.array([d.mask.frame_box for d in detections]).reshape(-1, 4)
+
+        predicted = np.array(
+            [t.predict(timestamp) for t in self._tracks], dtype=float
+        ).reshape(-1, 2)
+        shift = predicted - np.array(
+            [t.position for t in self._tracks], dtype=float
+        ).reshape(-1, 2)
+        predicted_boxes = np.array([t.box for t in self._tracks], dtype=float).reshape(
+            -1, 4
+        ) + np.tile(shift, 2)
+
+        pairs: List[Tuple[int, int]] = []
+        if len(self._tracks) and len(detections):
+            iou = _boxIou(predicted_boxes, det_boxes)
+            pairs = _greedyMatch(iou, iou >= TRACK_MATCH_IOU, True)
+            distance = np.linalg.norm(
+                predicted[:, None, :] - det_centers[None, :, :], axis=2
+            )
+            valid = distance <= TRACK_MATCH_DISTANCE_PX
+            for r, c in pairs:
+                valid[r, :] = False
+                valid[:, c] = False
+            pairs += _greedyMatch(distance, valid, False)
+
+        matched_tracks = {r for r, _ in pairs}
+        matched_detections = {c for _, c in pairs}
+        tracks: List[Track] = []
+        for r, c in pairs:
+            track = self._tracks[r]
+            position = (float(det_centers[c, 0]), float(det_centers[c, 1]))
+            dt = timestamp - track.timestamp
+            velocity = track.velocity
+            if dt > 0:
+                a = TRACK_VELOCITY_SMOOTHING
+                velocity = (
+                    a * (position[0] - track.position[0]) / dt
+                    + (1 - a) * track.velocity[0],
+                    a * (position[1] - track.position[1]) / dt
+                    + (1 - a) * track.velocity[1],
+                )
+            tracks.append(
+                Track(
+                    track_id=track.track_id,
+                    detection=replace(detections[c], instance_id=track.track_id),
+                    position=position,
+                    velocity=velocity,
+                    box=_boxTuple(det_boxes[c]),
+                    timestamp=timestamp,
+                    hits=track.hits + 1,
+                )
+            )
+
+        # unmatched tracks coast on their prediction for a few frames
+        for r, track in enumerate(self._tracks):
+            if r in matched_tracks or track.missed >= TRACK_MAX_MISSED_FRAMES:
+                continue
+            tracks.append(
+                replace(
+                    track,
+                    position=(float(predicted[r, 0]), float(predicted[r, 1])),
+                    box=_boxTuple(predicted_boxes[r]),
+                    timestamp=timestamp,
+                    missed=track.missed + 1,
+                )
+            )
+
+        for c, detection in enumerate(detections):
+            if c in matched_detections:
+                continue
+            tracks.append(
+                Track(
+                    track_id=self._next_id,
+                    detection=replace(detection, instance_id=self._next_id),
+                    position=(float(det_centers[c, 0]), float(det_centers[c, 1])),
+                    velocity=(0.0, 0.0),
+                    box=_boxTuple(det_boxes[c]),
+                    timestamp=timestamp,
+                )
+            )
+            self._next_id += 1
+
+        self._tracks = tracks
+        return [t for t in tracks if t.hits >= TRACK_MIN_HITS]
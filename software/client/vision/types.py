@@ -1,6 +1,18 @@
-from dataclasses import dataclass, field
-from typing import Optional, Tuple, List
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple, List, Dict, TYPE_CHECKING
 import numpy as np
+import cv2
+
+if TYPE_CHECKING:
+    from .frame_pool import PooledBuffer
+
+
+# (x1, y1, x2, y2) in frame pixels
+Region = Tuple[int, int, int, int]
+# (origin_x, origin_y, scale_x, scale_y) placing a pixel grid on the frame
+Grid = Tuple[float, float, float, float]
+FRAME_GRID: Grid = (0.0, 0.0, 1.0, 1.0)
 
 
 @dataclass
@@ -12,18 +24,386 @@ class VisionResult:
     timestamp: float
 
 
+class CompactMask:
+    # a bool mask kept as its bounding window: the window's top-left corner in its pixel
+    # grid plus the pixels inside it, optionally bit-packed along rows. a full-frame mask
+    # is ~2M pixels, the window around a part is a few thousand.
+    # the grid is either frame pixels or a coarser one (the model's mask resolution),
+    # grid maps it onto the frame as frame = origin + index * scale
+    x: int
+    y: int
+    width: int
+    height: int
+    grid_shape: Tuple[int, int]
+    grid: Grid
+    _data: np.ndarray
+    _packed: bool
+    # (m00, m10, m01) of the crop, computed on first use
+    _moments: Optional[Tuple[float, float, float]]
+    # grown copies by dilation radius, see dilated
+    _dilated: Dict[int, "CompactMask"]
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        crop: np.ndarray,
+        grid_shape: Tuple[int, int],
+        packed: bool = False,
+        grid: Grid = FRAME_GRID,
+    ):
+        self.x = x
+        self.y = y
+        self.height, self.width = crop.shape
+        self.grid_shape = (int(grid_shape[0]), int(grid_shape[1]))
+        self.grid = grid
+        self._packed = packed
+        self._data = np.packbits(crop, axis=1) if packed else crop
+        self._moments = None
+        self._dilated = {}
+
+    @classmethod
+    def fromDense(
+        cls, mask: np.ndarray, packed: bool = False, grid: Grid = FRAME_GRID
+    ) -> "CompactMask":
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if len(rows) == 0:
+            return cls(0, 0, np.zeros((0, 0), dtype=bool), mask.shape, packed, grid)
+        y1, y2 = int(rows[0]), int(rows[-1]) + 1
+        x1, x2 = int(cols[0]), int(cols[-1]) + 1
+        return cls(x1, y1, mask[y1:y2, x1:x2], mask.shape, packed, grid)
+
+    @classmethod
+    def fromScaled(
+        cls,
+        mask: np.ndarray,
+        region: Region,
+        frame_shape: Tuple[int, int],
+        packed: bool = False,
+    ) -> "CompactMask":
+        # mask is a lower resolution picture of region. only its bounding window is
+        # scaled up, sampling the same source pixels a full INTER_NEAREST resize would
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if len(rows) == 0:
+            return cls(0, 0, np.zeros((0, 0), dtype=bool), frame_shape, packed)
+        mh, mw = mask.shape
+        rx1, ry1, rx2, ry2 = region
+        # source pixel each destination pixel samples (the same floor(x / scale) cv2
+        # uses), then the destination span that lands inside the source window
+        all_cols = np.minimum(
+            (np.arange(rx2 - rx1) * (1.0 / ((rx2 - rx1) / mw))).astype(np.int64), mw - 1
+        )
+        all_rows = np.minimum(
+            (np.arange(ry2 - ry1) * (1.0 / ((ry2 - ry1) / mh))).astype(np.int64), mh - 1
+        )
+        fx1 = int(np.searchsorted(all_cols, cols[0], side="left"))
+        fx2 = int(np.searchsorted(all_cols, cols[-1], side="right"))
+        fy1 = int(np.searchsorted(all_rows, rows[0], side="left"))
+        fy2 = int(np.searchsorted(all_rows, rows[-1], side="right"))
+        src_cols = all_cols[fx1:fx2]
+        src_rows = all_rows[fy1:fy2]
+        crop = mask[np.ix_(src_rows, src_cols)]
+        return cls(rx1 + fx1, ry1 + fy1, crop, frame_shape, packed)
+
+    @property
+    def crop(self) -> np.ndarray:
+        if self._packed:
+            return np.unpackbits(self._data, axis=1, count=self.width).astype(bool)
+        return self._data
+
+    @property
+    def bbox(self) -> Region:
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    @property
+    def frame_box(self) -> Tuple[float, float, float, float]:
+        # bbox in frame pixels, whatever grid the mask is on
+        ox, oy, sx, sy = self.grid
+        x1, y1, x2, y2 = self.bbox
+        return (ox + x1 * sx, oy + y1 * sy, ox + x2 * sx, oy + y2 * sy)
+
+    def _momentSums(self) -> Tuple[float, float, float]:
+        # one cv2.moments pass gives both the area and the centroid, the mask never
+        # changes so it's kept
+        if self._moments is None:
+            if self.width == 0 or self.height == 0:
+                self._moments = (0.0, 0.0, 0.0)
+            else:
+                m = cv2.moments(
+                    np.ascontiguousarray(self.crop, dtype=np.uint8), binaryImage=True
+                )
+                self._moments = (m["m00"], m["m10"], m["m01"])
+        return self._moments
+
+    @property
+    def area(self) -> int:
+        return int(self._momentSums()[0])
+
+    @property
+    def centroid(self) -> Optional[Tuple[float, float]]:
+        # centre of mass in frame pixels
+        m00, m10, m01 = self._momentSums()
+        if m00 == 0:
+            return None
+        ox, oy, sx, sy = self.grid
+        # a grid pixel covers scale frame pixels, take the middle of them
+        return (
+            ox + (self.x + m10 / m00) * sx + (sx - 1) / 2,
+            oy + (self.y + m01 / m00) * sy + (sy - 1) / 2,
+        )
+
+    def window(self, region: Region) -> np.ndarray:
+        # the mask over an arbitrary frame window, False outside the stored crop
+        x1, y1, x2, y2 = region
+        out = np.zeros((y2 - y1, x2 - x1), dtype=bool)
+        ix1, iy1 = max(x1, self.x), max(y1, self.y)
+        ix2, iy2 = min(x2, self.x + self.width), min(y2, self.y + self.height)
+        if ix2 > ix1 and iy2 > iy1:
+            out[iy1 - y1 : iy2 - y1, ix1 - x1 : ix2 - x1] = self.crop[
+                iy1 - self.y : iy2 - self.y, ix1 - self.x : ix2 - self.x
+            ]
+        return out
+
+    def dilated(self, px: int) -> "CompactMask":
+        # the mask grown by a (2px+1) square. the carousel's near zone is asked for by
+        # every object every frame, the mask never changes so each radius is kept
+        cached = self._dilated.get(px)
+        if cached is not None:
+            return cached
+        if self.width == 0 or self.height == 0 or px <= 0:
+            return self
+        # px of margin on each side holds everything the dilation can reach
+        outer = self.window(
+            (
+                self.x - px,
+                self.y - px,
+                self.x + self.width + px,
+                self.y + self.height + px,
+            )
+        ).astype(np.uint8)
+        grown = cv2.dilate(outer, np.ones((px * 2 + 1, px * 2 + 1), np.uint8))
+        # then clip to the grid
+        h, w = self.grid_shape
+        x1, y1 = max(0, self.x - px), max(0, self.y - px)
+        x2 = min(w, self.x + self.width + px)
+        y2 = min(h, self.y + self.height + px)
+        crop = grown[
+            y1 - (self.y - px) : y2 - (self.y - px),
+            x1 - (self.x - px) : x2 - (self.x - px),
+        ].astype(bool)
+        cached = CompactMask(x1, y1, crop, self.grid_shape, grid=self.grid)
+        self._dilated[px] = cached
+        return cached
+
+    def toDense(self) -> np.ndarray:
+        h, w = self.grid_shape
+        return self.window((0, 0, w, h))
+
+    def onGrid(self, grid: Grid, grid_shape: Tuple[int, int]) -> "CompactMask":
+        # the same mask resampled (nearest) onto another grid, for comparing masks that
+        # came from differently sized or cropped inferences
+        if grid == self.grid:
+            return self
+        ox, oy, sx, sy = self.grid
+        tx, ty, tsx, tsy = grid
+        gx1 = max(0, int(np.floor((ox + self.x * sx - tx) / tsx)))
+        gy1 = max(0, int(np.floor((oy + self.y * sy - ty) / tsy)))
+        gx2 = min(
+            grid_shape[1], int(np.ceil((ox + (self.x + self.width) * sx - tx) / tsx))
+        )
+        gy2 = min(
+            grid_shape[0], int(np.ceil((oy + (self.y + self.height) * sy - ty) / tsy))
+        )
+        if gx2 <= gx1 or gy2 <= gy1:
+            return CompactMask(
+                0, 0, np.zeros((0, 0), dtype=bool), grid_shape, self._packed, grid
+            )
+        # sample the source at each target pixel's centre
+        src_x = (
+            np.floor((tx + (np.arange(gx1, gx2) + 0.5) * tsx - ox) / sx).astype(
+                np.int64
+            )
+            - self.x
+        )
+        src_y = (
+            np.floor((ty + (np.arange(gy1, gy2) + 0.5) * tsy - oy) / sy).astype(
+                np.int64
+            )
+            - self.y
+        )
+        valid_x = (src_x >= 0) & (src_x < self.width)
+        valid_y = (src_y >= 0) & (src_y < self.height)
+        crop = np.zeros((gy2 - gy1, gx2 - gx1), dtype=bool)
+        crop[np.ix_(valid_y, valid_x)] = self.crop[
+            np.ix_(src_y[valid_y], src_x[valid_x])
+        ]
+        return CompactMask(gx1, gy1, crop, grid_shape, self._packed, grid)
+
+
 @dataclass
 class DetectedMask:
-    mask: np.ndarray
+    mask: CompactMask
     confidence: float
     class_id: int
     instance_id: int
 
 
-@dataclass
+@dataclass(frozen=True)
+class Detections:
+    # one model output as plain numpy arrays, index i describes detection i. parsed once
+    # per inferred frame and shared by every consumer, so the arrays are read-only
+    class_ids: np.ndarray  # (N,) int
+    confidences: np.ndarray  # (N,) float
+    boxes: np.ndarray  # (N, 4) xyxy in frame pixels
+    masks: Optional[np.ndarray]  # (N, h, w) bool at model resolution
+    names: Dict[int, str]
+    # frame pixels the masks cover, None when they span the whole frame. set when
+    # inference ran on a crop of the frame
+    mask_region: Optional[Region] = None
+
+    def __post_init__(self):
+        for array in (self.class_ids, self.confidences, self.boxes):
+            array.flags.writeable = False
+        if self.masks is not None:
+            self.masks.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    def maskRegion(self, frame_shape) -> Region:
+        if self.mask_region is not None:
+            return self.mask_region
+        h, w = frame_shape[:2]
+        return (0, 0, w, h)
+
+    def regionMask(self, i: int, frame_shape) -> np.ndarray:
+        # mask i scaled to its region, it belongs at frame[y1:y2, x1:x2]
+        assert self.masks is not None
+        x1, y1, x2, y2 = self.maskRegion(frame_shape)
+        mask = self.masks[i]
+        if mask.shape != (y2 - y1, x2 - x1):
+            mask = (
+                cv2.resize(
+                    mask.astype(np.uint8),
+                    (x2 - x1, y2 - y1),
+                    interpolation=cv2.INTER_NEAREST,
+                )
+                > 0
+            )
+        return mask
+
+    def compactMask(
+        self,
+        i: int,
+        frame_shape,
+        packed: bool = False,
+        model_resolution: bool = False,
+    ) -> CompactMask:
+        # mask i in frame pixels, only its bounding window is ever scaled up. with
+        # model_resolution it isn't scaled at all and carries its grid instead
+        assert self.masks is not None
+        region = self.maskRegion(frame_shape)
+        if model_resolution:
+            mh, mw = self.masks.shape[1:]
+            grid = (
+                float(region[0]),
+                float(region[1]),
+                (region[2] - region[0]) / mw,
+                (region[3] - region[1]) / mh,
+            )
+            return CompactMask.fromDense(self.masks[i], packed, grid)
+        return CompactMask.fromScaled(self.masks[i], region, frame_shape[:2], packed)
+
+
 class CameraFrame:
     raw: np.ndarray
-    annotated: Optional[np.ndarray]
     results: List[VisionResult]
     timestamp: float
-    segmentation_map: Optional[np.ndarray] = field(default=None)
+    seq: int
+    # what the model found in raw, None for frames that weren't inferred
+    detections: Optional[Detections]
+    # capture time of the frame the detections were inferred on. older than timestamp
+    # when the motion gate reused an earlier frame's detections
+    detected_at: float
+    # pooled storage behind raw. raw is a read-only view shared by every consumer,
+    # anything that keeps the frame past the current call must retain() and release() it
+    buffer: Optional["PooledBuffer"]
+    _annotated: Optional[np.ndarray]
+    _render_annotated: Optional[Callable[[], Optional[np.ndarray]]]
+    _segmentation_map: Optional[np.ndarray]
+    _render_segmentation_map: Optional[Callable[[], Optional[np.ndarray]]]
+    _render_lock: threading.Lock
+    _generation: int
+
+    def __init__(
+        self,
+        raw: np.ndarray,
+        annotated: Optional[np.ndarray],
+        results: List[VisionResult],
+        timestamp: float,
+        segmentation_map: Optional[np.ndarray] = None,
+        seq: int = 0,
+        buffer: Optional["PooledBuffer"] = None,
+        detections: Optional[Detections] = None,
+        render_annotated: Optional[Callable[[], Optional[np.ndarray]]] = None,
+        render_segmentation_map: Optional[Callable[[], Optional[np.ndarray]]] = None,
+        detected_at: Optional[float] = None,
+    ):
+        self.raw = raw
+        self.results = results
+        self.timestamp = timestamp
+        self.seq = seq
+        self.buffer = buffer
+        self.detections = detections
+        self.detected_at = detected_at if detected_at is not None else timestamp
+        self._annotated = annotated
+        self._render_annotated = render_annotated
+        self._segmentation_map = segmentation_map
+        self._render_segmentation_map = render_segmentation_map
+        self._render_lock = threading.Lock()
+        # which use of the buffer this frame is, renders read raw only while it lasts
+        self._generation = buffer.generation if buffer is not None else 0
+
+    def _resolve(self, name: str) -> Optional[np.ndarray]:
+        # rendered the first time someone asks and kept, most frames are never shown or uploaded
+        if getattr(self, f"_render_{name}") is None:
+            return getattr(self, f"_{name}")
+        with self._render_lock:
+            render = getattr(self, f"_render_{name}")
+            if render is not None:
+                setattr(self, f"_{name}", self._renderHeld(render))
+                setattr(self, f"_render_{name}", None)
+        return getattr(self, f"_{name}")
+
+    def _renderHeld(
+        self, render: Callable[[], Optional[np.ndarray]]
+    ) -> Optional[np.ndarray]:
+        # renders read raw, so hold the buffer for the render. once it was recycled
+        # for a newer frame there is nothing left to render from
+        if self.buffer is None:
+            return render()
+        if not self.buffer.retainIfCurrent(self._generation):
+            return None
+        try:
+            return render()
+        finally:
+            self.buffer.release()
+
+    @property
+    def annotated(self) -> Optional[np.ndarray]:
+        return self._resolve("annotated")
+
+    @property
+    def segmentation_map(self) -> Optional[np.ndarray]:
+        # (h, w) uint8 class ids at frame resolution
+        return self._resolve("segmentation_map")
+
+    def retain(self) -> None:
+        if self.buffer is not None:
+            self.buffer.retain()
+
+    def release(self) -> None:
+        if self.buffer is not None:
+            self.buffer.release()
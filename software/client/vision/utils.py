@@ -3,68 +3,135 @@ import numpy as np
 import time
 from typing import Optional, Tuple
 
+from .types import CompactMask, Region
 
-def maskCenterOfMass(mask: np.ndarray) -> Optional[Tuple[float, float]]:
-    coords = np.argwhere(mask)
-    if len(coords) == 0:
+# every helper only looks at the windows where the masks could interact, never the
+# whole frame. masks may live on a coarser grid than the frame (see CompactMask), so
+# pixel thresholds are given in frame pixels and scaled onto the mask's grid, and
+# positions and distances come back in frame pixels
+
+
+def _intersect(a: Region, b: Region) -> Optional[Region]:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    if x2 <= x1 or y2 <= y1:
         return None
-    center_y = float(np.mean(coords[:, 0]))
-    center_x = float(np.mean(coords[:, 1]))
-    return (center_x, center_y)
+    return (x1, y1, x2, y2)
+
+
+def _expand(region: Region, px: int) -> Region:
+    return (region[0] - px, region[1] - px, region[2] + px, region[3] + px)
+
+
+def _gridPx(mask: CompactMask, px: int) -> int:
+    # frame pixel distance as a whole number of grid pixels
+    if mask.grid[2:] == (1.0, 1.0):
+        return px
+    return max(1, int(round(px / min(mask.grid[2], mask.grid[3]))))
+
+
+def _sameGrid(mask: CompactMask, other: CompactMask) -> CompactMask:
+    return other.onGrid(mask.grid, mask.grid_shape)
 
 
-def masksOverlap(mask1: np.ndarray, mask2: np.ndarray) -> bool:
-    overlap = np.logical_and(mask1, mask2)
+def _maskEdge(mask: CompactMask) -> np.ndarray:
+    # pixels of the crop with a background 8-neighbour. pad with background, except
+    # along the frame border which a full-frame erode treats as foreground
+    frame_h, frame_w = mask.grid_shape
+    x1, y1, x2, y2 = mask.bbox
+    padded = np.zeros((mask.height + 2, mask.width + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = mask.crop
+    if y1 == 0:
+        padded[0, :] = 1
+    if x1 == 0:
+        padded[:, 0] = 1
+    if y2 == frame_h:
+        padded[-1, :] = 1
+    if x2 == frame_w:
+        padded[:, -1] = 1
+    eroded = cv2.erode(padded, np.ones((3, 3), np.uint8), iterations=1)
+    return mask.crop & ~eroded[1:-1, 1:-1].astype(bool)
+
+
+def maskCenterOfMass(mask: CompactMask) -> Optional[Tuple[float, float]]:
+    # from the mask's cached moments, see CompactMask.centroid
+    return mask.centroid
+
+
+def masksOverlap(mask1: CompactMask, mask2: CompactMask) -> bool:
+    mask2 = _sameGrid(mask1, mask2)
+    window = _intersect(mask1.bbox, mask2.bbox)
+    if window is None:
+        return False
+    overlap = np.logical_and(mask1.window(window), mask2.window(window))
     return bool(np.any(overlap))
 
 
 def masksWithinDistance(
-    mask1: np.ndarray, mask2: np.ndarray, threshold_px: int
+    mask1: CompactMask, mask2: CompactMask, threshold_px: int
 ) -> bool:
-    kernel = np.ones((threshold_px * 2 + 1, threshold_px * 2 + 1), np.uint8)
-    dilated = cv2.dilate(mask2.astype(np.uint8), kernel, iterations=1)
-    return masksOverlap(mask1, dilated.astype(bool))
+    mask2 = _sameGrid(mask1, mask2)
+    threshold_px = _gridPx(mask1, threshold_px)
+    window = _intersect(mask1.bbox, _expand(mask2.bbox, threshold_px))
+    if window is None:
+        return False
+    dilated = mask2.dilated(threshold_px).window(window)
+    return bool(np.any(np.logical_and(mask1.window(window), dilated)))
 
 
 def maskEdgeProximity(
-    object_mask: np.ndarray,
-    target_mask: np.ndarray,
+    object_mask: CompactMask,
+    target_mask: CompactMask,
     proximity_px: int = 3,
     debug_id: Optional[int] = None,
 ) -> float:
-    mask_uint8 = object_mask.astype(np.uint8)
-    eroded = cv2.erode(mask_uint8, np.ones((3, 3), np.uint8), iterations=1)
-    edge = mask_uint8 - eroded
+    target_mask = _sameGrid(object_mask, target_mask)
+    proximity_px = _gridPx(object_mask, proximity_px)
+    # objects nowhere near the target never get as far as touching pixels
+    if _intersect(object_mask.bbox, _expand(target_mask.bbox, proximity_px)) is None:
+        return 0.0
+    edge = _maskEdge(object_mask)
+    edge_pixels = np.sum(edge)
+    if edge_pixels == 0:
+        return 0.0
 
-    # dilate target to create "near target" zone
-    kernel = np.ones((proximity_px * 2 + 1, proximity_px * 2 + 1), np.uint8)
-    dilated_target = cv2.dilate(target_mask.astype(np.uint8), kernel, iterations=1)
+    # the target's "near target" zone is dilated once per mask and shared by every
+    # object, only the part under this object is looked at
+    dilated_target = target_mask.dilated(proximity_px).window(object_mask.bbox)
 
     # what percentage of object edge is near the target
     edge_near_target = np.logical_and(edge, dilated_target)
-    edge_pixels = np.sum(edge)
+    return float(np.sum(edge_near_target) / edge_pixels)
 
-    proximity_value = 0.0
-    if edge_pixels > 0:
-        proximity_value = float(np.sum(edge_near_target) / edge_pixels)
 
-    return proximity_value
+def _tightBounds(mask: CompactMask) -> Optional[Tuple[int, int, int, int]]:
+    # inclusive (min_x, min_y, max_x, max_y) of the set pixels
+    crop = mask.crop
+    rows = np.flatnonzero(crop.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(crop.any(axis=0))
+    return (
+        mask.x + int(cols[0]),
+        mask.y + int(rows[0]),
+        mask.x + int(cols[-1]),
+        mask.y + int(rows[-1]),
+    )
 
 
-def maskMinDistance(object_mask: np.ndarray, target_mask: np.ndarray) -> int:
-    object_coords = np.argwhere(object_mask)
-    target_coords = np.argwhere(target_mask)
+def maskMinDistance(object_mask: CompactMask, target_mask: CompactMask) -> int:
+    target_mask = _sameGrid(object_mask, target_mask)
+    obj = _tightBounds(object_mask)
+    tgt = _tightBounds(target_mask)
 
-    if len(object_coords) == 0 or len(target_coords) == 0:
+    if obj is None or tgt is None:
         return 999999
 
     # bounding box distance (much faster than pixel-by-pixel)
-    obj_min_y, obj_min_x = object_coords.min(axis=0)
-    obj_max_y, obj_max_x = object_coords.max(axis=0)
-    tgt_min_y, tgt_min_x = target_coords.min(axis=0)
-    tgt_max_y, tgt_max_x = target_coords.max(axis=0)
+    obj_min_x, obj_min_y, obj_max_x, obj_max_y = obj
+    tgt_min_x, tgt_min_y, tgt_max_x, tgt_max_y = tgt
 
-    dx = max(0, obj_min_x - tgt_max_x, tgt_min_x - obj_max_x)
-    dy = max(0, obj_min_y - tgt_max_y, tgt_min_y - obj_max_y)
+    dx = max(0, obj_min_x - tgt_max_x, tgt_min_x - obj_max_x) * object_mask.grid[2]
+    dy = max(0, obj_min_y - tgt_max_y, tgt_min_y - obj_max_y) * object_mask.grid[3]
 
     return int(np.sqrt(dx * dx + dy * dy))
@@ -1,6 +1,6 @@
-from typing import Optional, List, Dict, Tuple
-from collections import deque
+from typing import Optional, List, Dict, Tuple, TYPE_CHECKING
 import base64
+import threading
 import time
 import cv2
 import cv2.aruco as aruco
@@ -9,16 +9,48 @@ import numpy as np
 from global_config import GlobalConfig
 from irl.config import IRLConfig
 from defs.events import CameraName, FrameEvent, FrameData, FrameResultData
-from defs.consts import FEEDER_OBJECT_CLASS_ID, FEEDER_CHANNEL_CLASS_ID
+from defs.consts import (
+    FEEDER_OBJECT_CLASS_ID,
+    FEEDER_CHANNEL_CLASS_ID,
+    FEEDER_CAROUSEL_CLASS_ID,
+)
 from blob_manager import VideoRecorder
 from .camera import CaptureThread
-from .inference import InferenceThread, CameraModelBinding
-from .types import CameraFrame, VisionResult, DetectedMask
+from .inference import InferenceThread, CameraModelBinding, BindingStats
+from .model_registry import ModelRegistry, mkModelRegistry
+from .motion_gate import MotionGate, MOTION_GATE_MAX_STALENESS_MS
+from .tracker import CentroidTracker, Track
+from .aruco import ArucoTagDetector, TagPositionLock
+from .types import CameraFrame, VisionResult, DetectedMask, Detections, Region
+
+if TYPE_CHECKING:
+    from subsystems.feeder.analysis import ChannelGeometry
 
 ANNOTATE_ARUCO_TAGS = True
 ARUCO_TAG_CACHE_MS = 5000
-FEEDER_MASK_CACHE_FRAMES = 3
+# keep feeder masks on the model's own grid instead of scaling them to camera pixels,
+# the analysis only needs centroids and coarse overlap
+FEEDER_MASKS_AT_MODEL_RESOLUTION = True
 TELEMETRY_INTERVAL_S = 30
+# classification cameras only decode at a low preview rate and skip inference until
+# Snapping asks for frames
+CLASSIFICATION_CAMERAS_ON_DEMAND = True
+CLASSIFICATION_IDLE_FPS = 2
+CLASSIFICATION_TRIGGER_HOLD_S = 0.5
+# the feeder frame drives Feeding, it always goes first and is dropped once it's too old
+# to act on. classification frames are only needed when Snapping asks for them
+FEEDER_INFERENCE_PRIORITY = 0
+FEEDER_INFERENCE_DEADLINE_MS = 150
+CLASSIFICATION_INFERENCE_PRIORITY = 1
+CLASSIFICATION_INFERENCE_DEADLINE_MS = 500
+INFERENCE_STATS_LOG_INTERVAL_S = 60
+# run the feeder model only on the channels and the carousel handoff once the aruco
+# geometry is known, at the crop's own resolution up to this size
+FEEDER_ROI_ENABLED = True
+FEEDER_ROI_MARGIN = 0.15  # fraction of the channel radius
+FEEDER_ROI_MAX_IMGSZ = 1280
+# reuse the last feeder result while nothing in the roi moves
+FEEDER_MOTION_GATE_ENABLED = True
 
 
 class VisionManager:
@@ -32,19 +64,41 @@ class VisionManager:
     _classification_top_binding: CameraModelBinding
     _video_recorder: Optional[VideoRecorder]
 
-    def __init__(self, irl_config: IRLConfig, gc: GlobalConfig):
+    def __init__(
+        self,
+        irl_config: IRLConfig,
+        gc: GlobalConfig,
+        model_registry: Optional[ModelRegistry] = None,
+    ):
         self.gc = gc
         self._irl_config = irl_config
         self._feeder_camera_config = irl_config.feeder_camera
-        self._feeder_capture = CaptureThread("feeder", irl_config.feeder_camera)
+        shared_frames = gc.inference_in_subprocess
+        classification_idle_fps = (
+            CLASSIFICATION_IDLE_FPS if CLASSIFICATION_CAMERAS_ON_DEMAND else None
+        )
+        self._feeder_capture = CaptureThread(
+            "feeder", irl_config.feeder_camera, shared_memory=shared_frames
+        )
         self._classification_bottom_capture = CaptureThread(
-            "classification_bottom", irl_config.classification_camera_bottom
+            "classification_bottom",
+            irl_config.classification_camera_bottom,
+            shared_memory=shared_frames,
+            idle_fps=classification_idle_fps,
         )
         self._classification_top_capture = CaptureThread(
-            "classification_top", irl_config.classification_camera_top
+            "classification_top",
+            irl_config.classification_camera_top,
+            shared_memory=shared_frames,
+            idle_fps=classification_idle_fps,
         )
 
-        self._inference = InferenceThread()
+        self._inference = InferenceThread(
+            out_of_process=gc.inference_in_subprocess,
+            lane_per_model=gc.inference_lane_per_model,
+            registry=model_registry or mkModelRegistry(gc),
+            logger=gc.logger,
+        )
 
         feeder_model = (
             gc.feeder_vision_model_path if gc.feeder_vision_model_path else None
@@ -59,23 +113,72 @@ class VisionManager:
             self._feeder_capture,
             feeder_model,
             exclude_classes_from_plot=[FEEDER_CHANNEL_CLASS_ID],
+            priority=FEEDER_INFERENCE_PRIORITY,
+            deadline_ms=FEEDER_INFERENCE_DEADLINE_MS,
+            roi_max_imgsz=FEEDER_ROI_MAX_IMGSZ,
+            # the feeder refuses detections older than its frame age limit, reusing
+            # them for longer would only get frames refused while nothing moves
+            motion_gate=(
+                MotionGate(
+                    min(
+                        MOTION_GATE_MAX_STALENESS_MS,
+                        gc.feeder_config.max_frame_age_ms,
+                    )
+                )
+                if FEEDER_MOTION_GATE_ENABLED
+                else None
+            ),
         )
         self._classification_bottom_binding = self._inference.addBinding(
-            self._classification_bottom_capture, classification_model
+            self._classification_bottom_capture,
+            classification_model,
+            on_demand=CLASSIFICATION_CAMERAS_ON_DEMAND,
+            priority=CLASSIFICATION_INFERENCE_PRIORITY,
+            deadline_ms=CLASSIFICATION_INFERENCE_DEADLINE_MS,
         )
         self._classification_top_binding = self._inference.addBinding(
-            self._classification_top_capture, classification_model
+            self._classification_top_capture,
+            classification_model,
+            on_demand=CLASSIFICATION_CAMERAS_ON_DEMAND,
+            priority=CLASSIFICATION_INFERENCE_PRIORITY,
+            deadline_ms=CLASSIFICATION_INFERENCE_DEADLINE_MS,
         )
 
         self._video_recorder = VideoRecorder() if gc.should_write_camera_feeds else None
 
         self._telemetry = None
         self._last_telemetry_save = 0.0
-
-        self._aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_ARUCO_ORIGINAL)
-        self._aruco_params = aruco.DetectorParameters()
+        self._last_stats_log = time.time()
+
+        self._aruco = ArucoTagDetector()
+        tag_config = irl_config.aruco_tags
+        self._channel_tag_lock = TagPositionLock(
+            [
+                tag_config.second_c_channel_radius1_id,
+                tag_config.second_c_channel_radius2_id,
+                tag_config.third_c_channel_radius1_id,
+                tag_config.third_c_channel_radius2_id,
+            ],
+            self._aruco,
+        )
+        # (locked tag positions, geometry solved from them)
+        self._locked_geometry: Optional[
+            Tuple[Dict[int, Tuple[float, float]], "ChannelGeometry"]
+        ] = None
         self._aruco_tag_cache: Dict[int, Tuple[Tuple[float, float], float]] = {}
-        self._feeder_mask_cache: deque = deque(maxlen=FEEDER_MASK_CACHE_FRAMES)
+        self._feeder_tracker = CentroidTracker()
+        # (frame seq, masks by class, object tracks) handed to every caller until the
+        # next feeder frame
+        self._feeder_masks: Optional[
+            Tuple[int, Dict[int, List[DetectedMask]], List[Track]]
+        ] = None
+        # (detections, their masks) so a reused motion-gated result isn't converted again
+        self._feeder_frame_masks: Optional[
+            Tuple[Detections, Dict[int, List[DetectedMask]]]
+        ] = None
+        self._feeder_masks_lock = threading.Lock()
+        self._feeder_carousel_box: Optional[Region] = None
+        self._feeder_overlay_frame: Optional[Tuple[CameraFrame, CameraFrame]] = None
 
     def setTelemetry(self, telemetry) -> None:
         self._telemetry = telemetry
@@ -86,6 +189,16 @@ class VisionManager:
         self._classification_top_capture.start()
         self._inference.start()
 
+    @property
+    def is_ready(self) -> bool:
+        # every model is loaded and warmed up, frames get inferred without startup stalls
+        return self._inference.is_ready
+
+    @property
+    def error(self) -> Optional[str]:
+        # set once inference has failed for good, the feeder can't run without it
+        return self._inference.error
+
     def stop(self) -> None:
         self._inference.stop()
         self._feeder_capture.stop()
@@ -97,10 +210,32 @@ class VisionManager:
     def recordFrames(self) -> None:
         if self._video_recorder:
             for camera in ["feeder", "classification_bottom", "classification_top"]:
-                frame = self.getFrame(camera)
+                frame = self.retainFrame(camera)
                 if frame:
-                    self._video_recorder.writeFrame(camera, frame.raw, frame.annotated)
+                    try:
+                        self._video_recorder.writeFrame(
+                            camera, frame.raw, frame.annotated
+                        )
+                    finally:
+                        frame.release()
         self._saveTelemetryFrames()
+        self._logInferenceStats()
+
+    def getInferenceStats(self) -> Dict[str, BindingStats]:
+        return self._inference.getStats()
+
+    def _logInferenceStats(self) -> None:
+        now = time.time()
+        if now - self._last_stats_log < INFERENCE_STATS_LOG_INTERVAL_S:
+            return
+        self._last_stats_log = now
+        for name, stats in self.getInferenceStats().items():
+            self.gc.logger.info(
+                f"inference {name}: {stats.fps:.1f} fps, queue {stats.queue_delay_ms:.0f}ms, "
+                f"infer {stats.inference_ms:.0f}ms, skipped stale {stats.skipped_stale}, "
+                f"reused static {stats.reused_static} ({stats.reuse_rate:.0%}, "
+                f"saved {stats.saved_inference_s:.1f}s)"
+            )
 
     def _saveTelemetryFrames(self) -> None:
         if self._telemetry is None:
@@ -116,49 +251,69 @@ class VisionManager:
             "classification_top": "classification_chamber_top",
         }
         for internal_name, telemetry_name in CAMERA_NAME_MAP.items():
-            frame = self.getFrame(internal_name)
-            if frame and frame.annotated is not None:
-                self._telemetry.saveCapture(
-                    telemetry_name,
-                    frame.raw,
-                    frame.annotated,
-                    "interval",
-                    segmentation_map=frame.segmentation_map,
-                )
-
-    @property
-    def feeder_frame(self) -> Optional[CameraFrame]:
-        frame = (
-            self._feeder_binding.latest_annotated_frame
-            or self._feeder_capture.latest_frame
+            frame = self.retainFrame(internal_name)
+            if frame is None:
+                continue
+            try:
+                if frame.annotated is not None:
+                    self._telemetry.saveCapture(telemetry_name, frame, "interval")
+            finally:
+                frame.release()
+
+    def _retainFeederSource(self) -> Optional[CameraFrame]:
+        # latest inferred feeder frame, or the latest capture before the first result.
+        # retained, caller must release()
+        return (
+            self._feeder_binding.retainLatestResult()
+            or self._feeder_capture.retainLatestFrame()
         )
+
+    def _retainFeederFrame(self) -> Optional[CameraFrame]:
+        frame = self._retainFeederSource()
         if frame is None:
             return None
 
         if not ANNOTATE_ARUCO_TAGS:
             return frame
 
-        # annotate with ArUco tags
-        annotated = frame.annotated if frame.annotated is not None else frame.raw
-        gray = cv2.cvtColor(frame.raw, cv2.COLOR_BGR2GRAY)
-        detector = aruco.ArucoDetector(self._aruco_dict, self._aruco_params)
-        corners, ids, _ = detector.detectMarkers(gray)
+        # one overlay frame per source frame, the ui and recorder both poll this. it
+        # shares the source's buffer, so the caller's retain covers both
+        cached = self._feeder_overlay_frame
+        if cached is not None and cached[0] is frame:
+            return cached[1]
+        overlay = CameraFrame(
+            raw=frame.raw,
+            annotated=None,
+            results=frame.results,
+            timestamp=frame.timestamp,
+            seq=frame.seq,
+            buffer=frame.buffer,
+            detections=frame.detections,
+            detected_at=frame.detected_at,
+            render_annotated=lambda: self._annotateFeederFrame(frame),
+            render_segmentation_map=lambda: frame.segmentation_map,
+        )
+        self._feeder_overlay_frame = (frame, overlay)
+        return overlay
+
+    def _annotateFeederFrame(self, frame: CameraFrame) -> np.ndarray:
+        # annotate with ArUco tags. the source images are shared, so draw on a single private copy
+        annotated = (
+            frame.annotated if frame.annotated is not None else frame.raw
+        ).copy()
+        detection = self._aruco.detect(frame)
 
-        if ids is not None:
-            annotated = annotated.copy()
+        if detection.ids is not None:
             aruco.drawDetectedMarkers(
-                annotated, corners, ids, borderColor=(0, 255, 255)
+                annotated, detection.corners, detection.ids, borderColor=(0, 255, 255)
             )
 
             # draw tag IDs in aqua/teal
-            for i, tag_id in enumerate(ids.flatten()):
-                tag_corners = corners[i][0]
-                center_x = int(np.mean(tag_corners[:, 0]))
-                center_y = int(np.mean(tag_corners[:, 1]))
+            for tag_id, (center_x, center_y) in detection.centers.items():
                 cv2.putText(
                     annotated,
                     str(tag_id),
-                    (center_x - 20, center_y + 10),
+                    (int(center_x) - 20, int(center_y) + 10),
                     cv2.FONT_HERSHEY_SIMPLEX,
                     1.6,
                     (0, 255, 0),  # bright green
@@ -166,29 +321,28 @@ class VisionManager:
                 )
 
         # annotate with channel geometry
-        annotated = self._annotateChannelGeometry(annotated)
-
-        return CameraFrame(
-            raw=frame.raw,
-            annotated=annotated,
-            results=frame.results,
-            timestamp=frame.timestamp,
-            segmentation_map=frame.segmentation_map,
-        )
-
-    @property
-    def classification_bottom_frame(self) -> Optional[CameraFrame]:
-        return (
-            self._classification_bottom_binding.latest_annotated_frame
-            or self._classification_bottom_capture.latest_frame
-        )
+        self._annotateChannelGeometry(annotated)
+        return annotated
 
-    @property
-    def classification_top_frame(self) -> Optional[CameraFrame]:
-        return (
-            self._classification_top_binding.latest_annotated_frame
-            or self._classification_top_capture.latest_frame
-        )
+    def _retainClassificationFrame(
+        self, binding: CameraModelBinding, capture: CaptureThread
+    ) -> Optional[CameraFrame]:
+        annotated = binding.retainLatestResult()
+        raw = capture.retainLatestFrame()
+        # an idle on-demand camera keeps previewing raw frames, don't pin the ui to the last snap
+        if (
+            binding.on_demand
+            and not capture.triggered
+            and raw is not None
+            and (annotated is None or raw.seq > annotated.seq)
+        ):
+            chosen = raw
+        else:
+            chosen = annotated or raw
+        for frame in (annotated, raw):
+            if frame is not None and frame is not chosen:
+                frame.release()
+        return chosen
 
     @property
     def feeder_result(self) -> Optional[VisionResult]:
@@ -202,13 +356,20 @@ class VisionManager:
     def classification_top_result(self) -> Optional[VisionResult]:
         return self._classification_top_binding.latest_result
 
-    def getFrame(self, camera_name: str) -> Optional[CameraFrame]:
+    def retainFrame(self, camera_name: str) -> Optional[CameraFrame]:
+        # the latest frame to show for a camera, retained so its pooled buffer can't be
+        # recycled while the caller reads it. caller must release()
         if camera_name == "feeder":
-            return self.feeder_frame
+            return self._retainFeederFrame()
         elif camera_name == "classification_bottom":
-            return self.classification_bottom_frame
+            return self._retainClassificationFrame(
+                self._classification_bottom_binding,
+                self._classification_bottom_capture,
+            )
         elif camera_name == "classification_top":
-            return self.classification_top_frame
+            return self._retainClassificationFrame(
+                self._classification_top_binding, self._classification_top_capture
+            )
         return None
 
     def getResult(self, camera_name: str) -> Optional[VisionResult]:
@@ -221,29 +382,27 @@ class VisionManager:
         return None
 
     def getFeederArucoTags(self) -> Dict[int, Tuple[float, float]]:
-        frame = self._feeder_capture.latest_frame
+        # the same frame the feeder loop and the overlay look at, so all of them share
+        # one detection
+        frame = self._retainFeederSource()
         if frame is None:
             return {}
 
         current_time = time.time()
-        gray = cv2.cvtColor(frame.raw, cv2.COLOR_BGR2GRAY)
-        detector = aruco.ArucoDetector(self._aruco_dict, self._aruco_params)
-        corners, ids, _ = detector.detectMarkers(gray)
+        try:
+            detection = self._aruco.detect(frame)
+        finally:
+            frame.release()
 
         result: Dict[int, Tuple[float, float]] = {}
         detected_ids = set()
 
         # add newly detected tags
-        if ids is not None:
-            for i, tag_id in enumerate(ids.flatten()):
-                tag_corners = corners[i][0]
-                center_x = float(np.mean(tag_corners[:, 0]))
-                center_y = float(np.mean(tag_corners[:, 1]))
-                tag_id_int = int(tag_id)
-                result[tag_id_int] = (center_x, center_y)
-                detected_ids.add(tag_id_int)
-                # update cache
-                self._aruco_tag_cache[tag_id_int] = ((center_x, center_y), current_time)
+        for tag_id, center in detection.centers.items():
+            result[tag_id] = center
+            detected_ids.add(tag_id)
+            # update cache
+            self._aruco_tag_cache[tag_id] = (center, current_time)
 
         # check cache for recently seen tags that weren't detected this frame
         for tag_id, (position, timestamp) in list(self._aruco_tag_cache.items()):
@@ -255,104 +414,172 @@ class VisionManager:
         return result
 
     def getFeederMasksByClass(self) -> Dict[int, List[DetectedMask]]:
-        # Really needs refactoring
-        # This function only caches object masks across frames.
-        # Channel and carousel masks are stationary so we always return current frame only.
-        # For objects: accumulate detections across multiple frames for stability.
-        # This helps with detection reliability when pieces are moving.
-        # Should eventually be refactored for proper object tracking and lifecycle management.
-        # this means that if you count the number of objects, it's ~FEEDER_MASK_CACHE_FRAMES bigger than it should be
-
-        results = self._feeder_binding.latest_raw_results
-        if not results or len(results) == 0:
-            # no new results, return cached objects only
-            aggregated: Dict[int, List[DetectedMask]] = {}
-            for object_masks in self._feeder_mask_cache:
-                if FEEDER_OBJECT_CLASS_ID not in aggregated:
-                    aggregated[FEEDER_OBJECT_CLASS_ID] = []
-                aggregated[FEEDER_OBJECT_CLASS_ID].extend(object_masks)
-            return aggregated
-
-        # process current frame
-        current_frame_all_masks: Dict[int, List[DetectedMask]] = {}
-        current_frame_object_masks: List[DetectedMask] = []
-
-        for result in results:
-            if result.masks is not None:
-                for i, mask in enumerate(result.masks):
-                    class_id = int(result.boxes[i].cls.item())
-                    confidence = float(result.boxes[i].conf.item())
-                    mask_data = mask.data[0].cpu().numpy()
-
-                    # get track ID if available, otherwise use index
-                    instance_id = i
-                    if result.boxes[i].id is not None:
-                        instance_id = int(result.boxes[i].id.item())
-
-                    # scale mask from model space to camera resolution
-                    model_height, model_width = mask_data.shape
-                    camera_height = self._feeder_camera_config.height
-                    camera_width = self._feeder_camera_config.width
-
-                    if model_height != camera_height or model_width != camera_width:
-                        scaled_mask = cv2.resize(
-                            mask_data.astype(np.uint8),
-                            (camera_width, camera_height),
-                            interpolation=cv2.INTER_NEAREST,
-                        ).astype(bool)
-                    else:
-                        scaled_mask = mask_data.astype(bool)
-
-                    detected_mask = DetectedMask(
-                        mask=scaled_mask,
-                        confidence=confidence,
-                        class_id=class_id,
-                        instance_id=instance_id,
-                    )
-
-                    if class_id not in current_frame_all_masks:
-                        current_frame_all_masks[class_id] = []
-                    current_frame_all_masks[class_id].append(detected_mask)
-
-                    # cache only object masks
-                    if class_id == FEEDER_OBJECT_CLASS_ID:
-                        current_frame_object_masks.append(detected_mask)
+        # channel and carousel masks come from the current frame, objects are the
+        # tracked pieces (see getFeederTracks) detected in it
+        return self._updateFeederTracks()[0]
+
+    def getFeederTracks(self) -> List[Track]:
+        return self._updateFeederTracks()[1]
+
+    def _updateFeederTracks(
+        self,
+    ) -> Tuple[Dict[int, List[DetectedMask]], List[Track]]:
+        # Feeding and Detecting both poll this, memoised per feeder frame so the
+        # tracker advances exactly once per frame. the result is shared, don't modify it
+        frame = self._feeder_binding.latest_annotated_frame
+        with self._feeder_masks_lock:
+            if frame is None or frame.detections is None:
+                return {}, []
+
+            if self._feeder_masks is not None and self._feeder_masks[0] == frame.seq:
+                return self._feeder_masks[1], self._feeder_masks[2]
+
+            current_frame_all_masks = self._feederFrameMasks(frame.detections)
+            tracks = self._feeder_tracker.update(
+                current_frame_all_masks.get(FEEDER_OBJECT_CLASS_ID, []),
+                frame.timestamp,
+            )
 
-        # add only object masks to cache
-        self._feeder_mask_cache.append(current_frame_object_masks)
+            result_masks: Dict[int, List[DetectedMask]] = {
+                class_id: masks
+                for class_id, masks in current_frame_all_masks.items()
+                if class_id != FEEDER_OBJECT_CLASS_ID
+            }
+            # a coasting track's mask is where the piece was when last seen, it may be
+            # gone by now. only pieces detected in this frame take part in mask tests
+            result_masks[FEEDER_OBJECT_CLASS_ID] = [
+                t.detection for t in tracks if t.missed == 0
+            ]
+
+            self._feeder_masks = (frame.seq, result_masks, tracks)
+            return result_masks, tracks
+
+    def _feederFrameMasks(
+        self, detections: Detections
+    ) -> Dict[int, List[DetectedMask]]:
+        cached = self._feeder_frame_masks
+        if cached is not None and cached[0] is detections:
+            return cached[1]
 
-        # build result: current frame for channels/carousel, aggregated cache for objects
-        result_masks: Dict[int, List[DetectedMask]] = {}
+        current_frame_all_masks: Dict[int, List[DetectedMask]] = {}
+        if detections.masks is not None:
+            for i in range(len(detections)):
+                class_id = int(detections.class_ids[i])
+                confidence = float(detections.confidences[i])
+
+                # index within the frame, CentroidTracker gives objects lasting ids
+                instance_id = i
+
+                # scale mask from model space (possibly a crop) to camera resolution,
+                # kept as just its bounding window
+                scaled_mask = detections.compactMask(
+                    i,
+                    (
+                        self._feeder_camera_config.height,
+                        self._feeder_camera_config.width,
+                    ),
+                    model_resolution=FEEDER_MASKS_AT_MODEL_RESOLUTION,
+                )
 
-        # add all non-object masks from current frame only
-        for class_id, masks in current_frame_all_masks.items():
-            if class_id != FEEDER_OBJECT_CLASS_ID:
-                result_masks[class_id] = masks
+                detected_mask = DetectedMask(
+                    mask=scaled_mask,
+                    confidence=confidence,
+                    class_id=class_id,
+                    instance_id=instance_id,
+                )
 
-        # aggregate object masks from cache
-        result_masks[FEEDER_OBJECT_CLASS_ID] = []
-        for object_masks in self._feeder_mask_cache:
-            result_masks[FEEDER_OBJECT_CLASS_ID].extend(object_masks)
+                if class_id not in current_frame_all_masks:
+                    current_frame_all_masks[class_id] = []
+                current_frame_all_masks[class_id].append(detected_mask)
 
-        return result_masks
+        self._feeder_frame_masks = (detections, current_frame_all_masks)
+        return current_frame_all_masks
 
     def getChannelGeometry(self, aruco_tag_config):
         from subsystems.feeder.analysis import computeChannelGeometry
 
-        aruco_tags = self.getFeederArucoTags()
-        return computeChannelGeometry(aruco_tags, aruco_tag_config)
+        aruco_tags = self._channelTags()
+        locked = self._locked_geometry
+        if locked is not None and locked[0] is aruco_tags:
+            geometry = locked[1]
+        else:
+            geometry = computeChannelGeometry(aruco_tags, aruco_tag_config)
+            if self._channel_tag_lock.locked is aruco_tags:
+                self._locked_geometry = (aruco_tags, geometry)
+        if FEEDER_ROI_ENABLED:
+            self._updateFeederRoi(geometry)
+        return geometry
+
+    def _channelTags(self) -> Dict[int, Tuple[float, float]]:
+        # the locked channel tag positions once enough frames agreed on them, live
+        # detections until then (and again after the camera was bumped)
+        frame = self._retainFeederSource()
+        changed = False
+        if frame is not None:
+            try:
+                changed = self._channel_tag_lock.update(frame, time.time())
+            finally:
+                frame.release()
+        if changed:
+            if self._channel_tag_lock.locked is not None:
+                self.gc.logger.info(
+                    f"channel geometry locked, tags at {self._channel_tag_lock.locked}"
+                )
+            else:
+                self.gc.logger.warn("channel tags moved, re-solving channel geometry")
+        locked = self._channel_tag_lock.locked
+        if locked is not None:
+            return locked
+        return self.getFeederArucoTags()
+
+    def _updateFeederRoi(self, geometry) -> None:
+        # union of the channel circles and wherever the carousel was last seen. the
+        # binding still looks at the full frame now and then, which is what finds
+        # the carousel in the first place
+        detections = self._feeder_binding.latest_detections
+        if detections is not None:
+            carousel_boxes = detections.boxes[
+                detections.class_ids == FEEDER_CAROUSEL_CLASS_ID
+            ]
+            if len(carousel_boxes) > 0:
+                x1, y1 = carousel_boxes[:, :2].min(axis=0)
+                x2, y2 = carousel_boxes[:, 2:].max(axis=0)
+                self._feeder_carousel_box = (int(x1), int(y1), int(x2), int(y2))
+
+        boxes: List[Tuple[float, float, float, float]] = []
+        for ch in (geometry.second_channel, geometry.third_channel):
+            if ch is None:
+                continue
+            r = ch.radius * (1.0 + FEEDER_ROI_MARGIN)
+            boxes.append(
+                (ch.center[0] - r, ch.center[1] - r, ch.center[0] + r, ch.center[1] + r)
+            )
+        if not boxes:
+            self._feeder_binding.setRoi(None)
+            return
+        if self._feeder_carousel_box is not None:
+            boxes.append(self._feeder_carousel_box)
+
+        corners = np.array(boxes)
+        self._feeder_binding.setRoi(
+            (
+                int(np.floor(corners[:, 0].min())),
+                int(np.floor(corners[:, 1].min())),
+                int(np.ceil(corners[:, 2].max())),
+                int(np.ceil(corners[:, 3].max())),
+            )
+        )
 
-    def _annotateChannelGeometry(self, annotated: np.ndarray) -> np.ndarray:
+    def _annotateChannelGeometry(self, annotated: np.ndarray) -> None:
+        # draws in place, caller owns annotated
         from subsystems.feeder.analysis import computeChannelGeometry
 
-        aruco_tags = self.getFeederArucoTags()
+        aruco_tags = self._channel_tag_lock.locked or self.getFeederArucoTags()
         geometry = computeChannelGeometry(
             aruco_tags,
             self._irl_config.aruco_tags,
         )
 
-        annotated = annotated.copy()
-
         # get tag positions for both channels (only radius tags needed)
         third_r1_pos = aruco_tags.get(
             self._irl_config.aruco_tags.third_c_channel_radius1_id
@@ -478,77 +705,74 @@ class VisionManager:
                 2,
             )
 
-        return annotated
-
     def captureFreshClassificationFrames(
         self, timeout_s: float = 1.0
     ) -> Tuple[Optional[CameraFrame], Optional[CameraFrame]]:
-        start_time = time.time()
-        while time.time() - start_time < timeout_s:
-            top = self._classification_top_binding.latest_annotated_frame
-            bottom = self._classification_bottom_binding.latest_annotated_frame
-            if (
-                top
-                and bottom
-                and top.timestamp > start_time
-                and bottom.timestamp > start_time
-            ):
-                return (top, bottom)
-            time.sleep(0.05)
+        # wait for inference on frames captured after this call, not just newer timestamps.
+        # both frames come retained, caller must release()
+        deadline = time.time() + timeout_s
+        for capture in (
+            self._classification_top_capture,
+            self._classification_bottom_capture,
+        ):
+            capture.trigger(timeout_s + CLASSIFICATION_TRIGGER_HOLD_S)
+        top_after = self._classification_top_capture.latest_seq
+        bottom_after = self._classification_bottom_capture.latest_seq
+        top = self._classification_top_binding.waitForResult(top_after, timeout_s)
+        bottom = self._classification_bottom_binding.waitForResult(
+            bottom_after, max(0.0, deadline - time.time())
+        )
         return (
-            self._classification_top_binding.latest_annotated_frame,
-            self._classification_bottom_binding.latest_annotated_frame,
+            top or self._classification_top_binding.retainLatestResult(),
+            bottom or self._classification_bottom_binding.retainLatestResult(),
         )
 
+    def waitForFeederResult(
+        self, after_seq: int, timeout_s: float
+    ) -> Optional[CameraFrame]:
+        # retained, caller must release()
+        return self._feeder_binding.waitForResult(after_seq, timeout_s)
+
     def getClassificationCrops(
-        self, timeout_s: float = 1.0
+        self, top_frame: Optional[CameraFrame], bottom_frame: Optional[CameraFrame]
     ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-        top_frame, bottom_frame = self.captureFreshClassificationFrames(timeout_s)
-        top_crop = self._extractLargestObjectCrop(
-            top_frame, self._classification_top_binding.latest_raw_results
-        )
-        bottom_crop = self._extractLargestObjectCrop(
-            bottom_frame, self._classification_bottom_binding.latest_raw_results
+        # crops come from the frames' own detections, not whatever inferred last. the
+        # caller holds the frames retained while this reads them
+        return (
+            self._extractLargestObjectCrop(top_frame),
+            self._extractLargestObjectCrop(bottom_frame),
         )
-        return (top_crop, bottom_crop)
 
     def _extractLargestObjectCrop(
-        self, frame: Optional[CameraFrame], raw_results
+        self, frame: Optional[CameraFrame]
     ) -> Optional[np.ndarray]:
-        if frame is None or raw_results is None or len(raw_results) == 0:
-            return None
-
-        boxes = raw_results[0].boxes
-        if boxes is None or len(boxes) == 0:
+        if frame is None or frame.detections is None:
             return None
+        detections = frame.detections
 
-        best_box = None
-        best_area = 0
-        for box in boxes:
-            class_id = int(box.cls[0])
-            if class_id != 0:
-                continue
-            xyxy = box.xyxy[0].tolist()
-            area = (xyxy[2] - xyxy[0]) * (xyxy[3] - xyxy[1])
-            if area > best_area:
-                best_area = area
-                best_box = xyxy
-
-        if best_box is None:
+        boxes = detections.boxes[detections.class_ids == 0]
+        if len(boxes) == 0:
             return None
-
-        x1, y1, x2, y2 = map(int, best_box)
-        return frame.raw[y1:y2, x1:x2]
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        x1, y1, x2, y2 = map(int, boxes[np.argmax(areas)])
+        # copy out of the pooled frame buffer, the crop outlives the frame
+        return frame.raw[y1:y2, x1:x2].copy()
 
     def _encodeFrame(self, frame) -> str:
+        # frame is a view into a pooled buffer, the caller holds it retained
         _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
         return base64.b64encode(buffer).decode("utf-8")
 
     def getFrameEvent(self, camera_name: CameraName) -> Optional[FrameEvent]:
-        frame = self.getFrame(camera_name.value)
+        frame = self.retainFrame(camera_name.value)
         if frame is None:
             return None
+        try:
+            return self._frameEvent(camera_name, frame)
+        finally:
+            frame.release()
 
+    def _frameEvent(self, camera_name: CameraName, frame: CameraFrame) -> FrameEvent:
         results_data = [
             FrameResultData(
                 class_id=r.class_id,